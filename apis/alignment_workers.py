@@ -0,0 +1,91 @@
+# Whisper 단어 타이밍 분석을 API 프로세스와 분리된 워커 프로세스 풀에서 실행
+# 무거운 추론이 GIL 과 CPU 를 점유해서 다른 HTTP 요청이 멈추는 것을 막는다.
+import os
+import asyncio
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dotenv import load_dotenv
+
+load_dotenv()
+
+_CPU_COUNT = os.cpu_count() or 1
+# 🔹 정렬 워커 프로세스 수 (0 이면 API 프로세스 안에서 스레드로 실행, 기본: 코어 4개당 1개, 최대 4개)
+ALIGNMENT_WORKERS = int(os.getenv("ALIGNMENT_WORKERS", str(max(1, min(4, _CPU_COUNT // 4)))))
+# 🔹 워커 하나당 torch intra-op 스레드 수 (기본: 코어를 워커 수로 나눔, 워커끼리 코어를 두고 경쟁하지 않도록)
+ALIGNMENT_TORCH_THREADS = int(os.getenv("ALIGNMENT_TORCH_THREADS", str(max(1, _CPU_COUNT // max(1, ALIGNMENT_WORKERS)))))
+# 🔹 워커가 모두 바쁠 때 대기할 수 있는 작업 수 (넘으면 제출하는 쪽이 기다림)
+ALIGNMENT_QUEUE_SIZE = int(os.getenv("ALIGNMENT_QUEUE_SIZE", "16"))
+# 🔹 워커 상태 조회 응답을 기다리는 최대 시간 (초, 정렬 작업 뒤에 밀린 워커는 결과에서 빠짐)
+ALIGNMENT_STATS_TIMEOUT = float(os.getenv("ALIGNMENT_STATS_TIMEOUT", "1"))
+
+_executor = None
+_submit_semaphore = asyncio.Semaphore(max(1, ALIGNMENT_WORKERS) + ALIGNMENT_QUEUE_SIZE)
+
+
+def _init_worker(torch_threads, model_names):
+    # 워커 프로세스 시작 시 torch 스레드 수 고정 + Whisper 모델 미리 로드
+    import torch
+    from apis import whisper_registry
+
+    torch.set_num_threads(torch_threads)
+    torch.set_num_interop_threads(1)
+    whisper_registry.preload_models(model_names)
+
+
+def _ping():
+    return os.getpid()
+
+
+def start_workers():
+    # 서버 시작 시 워커 풀 생성 (torch 와 fork 는 충돌하므로 spawn 사용)
+    global _executor
+    if ALIGNMENT_WORKERS <= 0 or _executor is not None:
+        return
+    from apis import whisper_registry
+
+    model_names = list(dict.fromkeys([whisper_registry.WHISPER_MODEL_SIZE] + whisper_registry.WHISPER_PRELOAD_MODELS))
+    _executor = ProcessPoolExecutor(
+        max_workers=ALIGNMENT_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(ALIGNMENT_TORCH_THREADS, model_names)
+    )
+    # 워커 프로세스는 작업이 들어올 때 생성되므로 미리 하나씩 깨워서 모델 로드를 시작
+    for _ in range(ALIGNMENT_WORKERS):
+        _executor.submit(_ping)
+    print(f"🧵 정렬 워커 {ALIGNMENT_WORKERS}개 시작 (torch 스레드 {ALIGNMENT_TORCH_THREADS}개씩)")
+
+
+def shutdown_workers():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def run(func, *args, **kwargs):
+    """
+    정렬 함수(모듈 최상위 함수)를 워커 풀에서 실행하고 결과를 기다린다.
+    워커 풀이 없으면 현재 프로세스의 스레드에서 실행한다.
+    """
+    async with _submit_semaphore:
+        if _executor is None:
+            return await asyncio.to_thread(func, *args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+
+
+async def worker_stats(func):
+    """
+    워커마다 func(상태 조회 함수, 결과에 "pid" 포함)를 실행한 결과 목록.
+    풀은 작업을 보낼 워커를 고를 수 없으므로 워커 수만큼 동시에 보내고 pid 로 중복을 제거한다.
+    조회는 대기 중인 정렬 작업 뒤에 줄을 서므로 ALIGNMENT_STATS_TIMEOUT 안에 응답한 워커만 반환한다.
+    """
+    if _executor is None:
+        return [func()]
+    loop = asyncio.get_running_loop()
+    futures = [loop.run_in_executor(_executor, func) for _ in range(ALIGNMENT_WORKERS)]
+    done, _ = await asyncio.wait(futures, timeout=ALIGNMENT_STATS_TIMEOUT)
+    results = [future.result() for future in done if future.exception() is None]
+    return list({result["pid"]: result for result in results}.values())
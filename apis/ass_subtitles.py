@@ -0,0 +1,128 @@
+# 정렬된 자막 타임라인을 ASS 자막 파일로 변환
+# ffmpeg(libass) 가 인코딩하면서 직접 자막을 입히므로 moviepy 의 프레임 단위 합성이 필요 없다.
+# 위치/크기/색/pop 애니메이션은 create_subtitle 의 moviepy 합성 결과와 맞춘다.
+import os
+from PIL import ImageColor
+from apis import caption_renderer
+from apis import pop_animation
+
+ASS_HEADER = """[Script Info]
+ScriptType: v4.00+
+PlayResX: {width}
+PlayResY: {height}
+WrapStyle: 1
+ScaledBorderAndShadow: yes
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+Style: Caption,{font},{fontsize},{color},{color},&H00000000,&H00000000,0,0,0,0,100,100,0,0,1,0,0,5,0,0,0,1
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+
+
+def ass_color(color):
+    # "white", "#ffcc00" 등 → ASS 색 (&HAABBGGRR, 알파 00 = 불투명)
+    r, g, b = ImageColor.getrgb(color)[:3]
+    return f"&H00{b:02X}{g:02X}{r:02X}"
+
+
+def ass_time(seconds):
+    # 초 → H:MM:SS.cc (ASS 는 1/100초 단위)
+    centiseconds = max(0, int(round(seconds * 100)))
+    hours, centiseconds = divmod(centiseconds, 360000)
+    minutes, centiseconds = divmod(centiseconds, 6000)
+    secs, centiseconds = divmod(centiseconds, 100)
+    return f"{hours}:{minutes:02d}:{secs:02d}.{centiseconds:02d}"
+
+
+def escape_text(text):
+    # 중괄호는 override 태그로 해석되므로 전각 문자로, 줄바꿈은 \N 으로
+    return text.replace("{", "｛").replace("}", "｝").replace("\n", "\\N")
+
+
+def resolve_font(font):
+    """
+    moviepy 자막과 같은 폰트 파일을 libass 가 쓰도록 (패밀리 이름, 폰트 폴더) 반환.
+    폰트 파일을 찾지 못하면(fc-match 가 다른 폰트로 대체한 경우 포함) 이름을 그대로 넘겨 fontconfig 에 맡긴다.
+    """
+    font_file = caption_renderer.resolve_font_file(font)
+    if font_file is None:
+        print(f"⚠️ 폰트를 찾지 못했습니다 ({font}), libass 가 대체 폰트로 그립니다.")
+        return font, None
+    family = caption_renderer.get_font(font_file, 10).getname()[0]
+    return family, os.path.dirname(os.path.abspath(font_file))
+
+
+def ass_font_size(font, fontsize):
+    # libass 의 Fontsize 는 em 크기가 아니라 줄 높이(ascent + descent) 기준이므로 Pillow 렌더링과 같은 크기로 환산
+    font_file = caption_renderer.resolve_font_file(font)
+    if font_file is None:
+        return fontsize
+    return sum(caption_renderer.get_font(font_file, fontsize).getmetrics())
+
+
+def caption_dialogue(caption, offset, center_x, top_y, box_height, pop, fontsize):
+    """
+    자막 하나를 Dialogue 줄로 변환.
+    moviepy 에서는 (클립 너비 × box_height) 박스의 가운데에 글자를 그리고 박스 상단을 top_y 에 둔다.
+    pop 은 박스가 상단 기준으로 0.3배 → 1배 커지므로 글자 중심도 함께 내려온다.
+    """
+    center_y = top_y + box_height / 2
+    if pop:
+        duration_ms = int(pop_animation.POP_DURATION * 1000)
+        start_scale = int(pop_animation.POP_START_SCALE * 100)
+        start_y = top_y + box_height * pop_animation.POP_START_SCALE / 2
+        tags = (
+            f"\\an5\\fs{fontsize}\\move({center_x:.0f},{start_y:.0f},{center_x:.0f},{center_y:.0f},0,{duration_ms})"
+            f"\\fscx{start_scale}\\fscy{start_scale}\\t(0,{duration_ms},\\fscx100\\fscy100)"
+        )
+    else:
+        tags = f"\\an5\\fs{fontsize}\\pos({center_x:.0f},{center_y:.0f})"
+
+    start = ass_time(offset + caption["start"])
+    end = ass_time(offset + caption["end"])
+    return f"Dialogue: 0,{start},{end},Caption,,0,0,0,,{{{tags}}}{escape_text(caption['word'])}"
+
+
+def build_ass(segments, canvas_size, font, color, box_height, pop):
+    """
+    이어 붙인 영상 전체에 대한 ASS 문서 생성.
+    segments: [{"width", "height", "duration", "font_size", "y", "timeline"}, ...]
+              (timeline 은 create_subtitle.*_caption_timeline 결과, 클립 기준 시간,
+               "box_height" 가 있으면 그 세그먼트는 box_height 대신 사용)
+    canvas_size: 이어 붙인 영상 크기 (작은 클립은 가운데 배치 - concatenate_videoclips(method="compose") 와 동일)
+    """
+    canvas_w, canvas_h = canvas_size
+    family, _ = resolve_font(font)
+    lines = [ASS_HEADER.format(
+        width=canvas_w,
+        height=canvas_h,
+        font=family,
+        fontsize=ass_font_size(font, segments[0]["font_size"]) if segments else 20,
+        color=ass_color(color),
+    ).rstrip("\n")]
+
+    offset = 0.0
+    for segment in segments:
+        left = (canvas_w - segment["width"]) / 2
+        top = (canvas_h - segment["height"]) / 2
+        fontsize = ass_font_size(font, segment["font_size"])
+        segment_box_height = segment.get("box_height") or box_height
+        for caption in segment["timeline"]:
+            if not caption["word"].strip() or caption["end"] <= caption["start"]:
+                continue
+            lines.append(caption_dialogue(
+                caption, offset, left + segment["width"] / 2, top + segment["y"], segment_box_height, pop, fontsize
+            ))
+        offset += segment["duration"]
+
+    return "\n".join(lines) + "\n"
+
+
+def write_ass(path, segments, canvas_size, font, color, box_height, pop):
+    # ASS 파일 저장 (libass 는 UTF-8 BOM 없이도 읽음) 후 fontsdir 로 넘길 폰트 폴더 반환
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(build_ass(segments, canvas_size, font, color, box_height, pop))
+    return resolve_font(font)[1]
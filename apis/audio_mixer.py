@@ -0,0 +1,133 @@
+# 최종 영상 오디오(배경음악 + TTS 트랙) 믹서
+# AudioFileClip + volumex + CompositeAudioClip 은 렌더링마다 mp3 를 다시 디코딩하고 청크 단위로 파이썬에서 섞지만,
+# 배경음악은 music/bgm_0X.mp3 몇 곡뿐이므로 출력 샘플레이트의 PCM 으로 한 번만 디코딩해 두고
+# 음량 / 덕킹 / 길이 맞추기를 NumPy 로 한 번에 처리한다.
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+from dotenv import load_dotenv
+from apis import ffmpeg_utils
+
+load_dotenv()
+
+# 🔹 배경음악 음량 (기존 volumex(0.2))
+BGM_VOLUME = float(os.getenv("BGM_VOLUME", "0.2"))
+# 🔹 나레이션이 나오는 동안 배경음악을 더 줄이는 덕킹 (기본 사용 안 함, BGM_DUCK_GAIN 배만큼 추가로 줄임)
+BGM_DUCKING = os.getenv("BGM_DUCKING", "false").lower() == "true"
+BGM_DUCK_GAIN = float(os.getenv("BGM_DUCK_GAIN", "0.5"))
+DUCK_ATTACK_SECONDS = 0.1
+DUCK_RELEASE_SECONDS = 0.3
+DUCK_THRESHOLD = 0.01  # 이보다 큰 나레이션 진폭을 발화로 판단
+# 🔹 오디오를 믹스하는 프로세스(렌더 워커, 파이프라인 엔진이면 API 프로세스)가 시작할 때 music/ 의 배경음악을 미리 디코딩할지 여부
+BGM_PRELOAD = os.getenv("BGM_PRELOAD", "true").lower() == "true"
+# 🔹 디코딩된 배경음악 PCM 메모리 캐시 용량 (바이트)
+BGM_CACHE_MAX_BYTES = int(os.getenv("BGM_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+_bgm_cache = OrderedDict()  # (경로, 크기, 수정 시각, 샘플레이트) -> (n, 2) float32 PCM
+_bgm_cache_bytes = 0
+_lock = threading.Lock()
+
+
+def load_bgm(music_path, sample_rate):
+    # 배경음악을 stereo float32 PCM 으로 반환 (처음 한 번만 디코딩, 반환 배열은 공유되므로 읽기 전용)
+    global _bgm_cache_bytes
+    stat = os.stat(music_path)
+    key = (os.path.abspath(music_path), stat.st_size, stat.st_mtime_ns, sample_rate)
+    with _lock:
+        pcm = _bgm_cache.get(key)
+        if pcm is not None:
+            _bgm_cache.move_to_end(key)
+            return pcm
+
+    pcm = ffmpeg_utils.decode_audio(music_path, sample_rate, channels=2)
+    pcm.setflags(write=False)
+    with _lock:
+        if key not in _bgm_cache:
+            _bgm_cache[key] = pcm
+            _bgm_cache_bytes += pcm.nbytes
+            while _bgm_cache_bytes > BGM_CACHE_MAX_BYTES and len(_bgm_cache) > 1:
+                _, evicted = _bgm_cache.popitem(last=False)
+                _bgm_cache_bytes -= evicted.nbytes
+    return pcm
+
+
+def preload_bgm(music_dir, sample_rate):
+    # 서버 시작 시 배경음악을 미리 디코딩
+    for filename in sorted(os.listdir(music_dir)):
+        if filename.endswith(".mp3"):
+            try:
+                load_bgm(os.path.join(music_dir, filename), sample_rate)
+            except (OSError, RuntimeError) as e:
+                print(f"⚠️ 배경음악 디코딩 실패 ({filename}): {e}")
+
+
+def _smooth(envelope, window):
+    # 이동 평균으로 0/1 발화 구간을 부드러운 곡선으로
+    if window <= 1 or len(envelope) == 0:
+        return envelope
+    kernel = np.ones(window, dtype=np.float32) / window
+    return np.convolve(envelope, kernel, mode="same")
+
+
+def ducking_gain(narration, sample_rate, duck_gain=BGM_DUCK_GAIN):
+    """
+    나레이션 mono PCM 으로 배경음악에 곱할 게인 곡선(1 → duck_gain) 계산.
+    발화 구간을 release 만큼 늘린 뒤 attack 길이로 부드럽게 해서 갑자기 줄거나 커지지 않게 한다.
+    """
+    voiced = (np.abs(narration) > DUCK_THRESHOLD).astype(np.float32)
+    hold = int(DUCK_RELEASE_SECONDS * sample_rate)
+    if hold > 1 and voiced.any():
+        # 발화가 끝난 뒤 hold 샘플 동안 유지 (누적합으로 구간 최대값 계산)
+        cumulative = np.concatenate(([0.0], np.cumsum(voiced, dtype=np.float64)))
+        index = np.arange(len(voiced))
+        window_start = np.maximum(index - hold + 1, 0)
+        voiced = ((cumulative[index + 1] - cumulative[window_start]) > 0).astype(np.float32)
+    envelope = _smooth(voiced, int(DUCK_ATTACK_SECONDS * sample_rate))
+    return 1.0 - (1.0 - duck_gain) * envelope
+
+
+def mix(tts_track, bgm, duration, sample_rate, bgm_volume=BGM_VOLUME, ducking=BGM_DUCKING):
+    """
+    배경음악(stereo)과 TTS 트랙(mono)을 영상 길이(duration 초)에 맞춰 한 번에 믹스.
+    CompositeAudioClip 과 같이 정규화 없이 합산하고, 짧은 쪽은 무음으로 채운다.
+    반환: (n, 2) float32
+    """
+    length = int(round(duration * sample_rate))
+    mixed = np.zeros((length, 2), dtype=np.float32)
+
+    bgm_length = min(length, len(bgm))
+    mixed[:bgm_length] = bgm[:bgm_length]
+    mixed *= bgm_volume
+
+    narration = np.zeros(length, dtype=np.float32)
+    narration_length = min(length, len(tts_track))
+    narration[:narration_length] = tts_track[:narration_length]
+
+    if ducking:
+        mixed *= ducking_gain(narration, sample_rate)[:, None]
+    mixed += narration[:, None]
+    return mixed
+
+
+def mix_final_audio(tts_track, music_path, duration, sample_rate):
+    # 최종 영상용 믹스 (캐시된 배경음악 사용)
+    return mix(tts_track, load_bgm(music_path, sample_rate), duration, sample_rate)
+
+
+def encode_aac(path, pcm, sample_rate):
+    """
+    (n, 2) float32 믹스를 AAC(.m4a) 로 인코딩.
+    moviepy write_videofile(audio=파일 경로) 는 audio_codec 을 무시하고 -acodec copy 로 넣으므로
+    mp4 에 그대로 들어갈 수 있는 AAC 로 미리 인코딩해서 넘긴다.
+    """
+    ffmpeg_utils.run_ffmpeg(
+        ["-f", "f32le", "-ar", str(sample_rate), "-ac", "2", "-i", "pipe:0", "-c:a", "aac", path],
+        input_data=np.ascontiguousarray(pcm, dtype=np.float32).tobytes()
+    )
+    return path
+
+
+def cache_stats():
+    with _lock:
+        return {"tracks": len(_bgm_cache), "bytes": _bgm_cache_bytes}
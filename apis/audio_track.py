@@ -0,0 +1,50 @@
+# TTS 문장 오디오를 5초 슬롯 규칙에 맞춰 하나의 PCM 트랙으로 조립하는 함수 모음
+import numpy as np
+
+# 🔹 나레이션 트랙 샘플레이트 (moviepy 오디오 기본값과 동일)
+TRACK_SAMPLE_RATE = 44100
+
+
+def clip_offsets_ms(clip_lengths_ms, interval=5000):
+    """
+    각 문장 오디오가 놓일 위치(ms)를 계산.
+    i 번째 문장은 i * interval 에서 시작하되, 앞 문장이 길어 넘치면 앞 문장이 끝난 뒤에 놓이고
+    두 번째 문장부터는 0.5초 무음을 더 둔다.
+    반환: (위치 리스트, 5초 단위로 맞춘 전체 길이)
+    """
+    offsets = []
+    end = 0
+    for idx, length in enumerate(clip_lengths_ms):
+        start_time = idx * interval
+        offset = max(start_time, end)
+        if start_time >= 5000:
+            offset += 500
+        offsets.append(offset)
+        end = offset + length
+
+    total_ms = ((int(np.ceil(end)) + 4999) // 5000) * 5000
+    return offsets, total_ms
+
+
+def assemble_track(clips, sample_rate, interval=5000):
+    """
+    mono PCM 클립들을 미리 할당한 버퍼의 각 위치에 한 번씩만 복사해서 트랙 구성.
+    반환: (float32 트랙, 각 클립 위치(ms) 리스트)
+    """
+    lengths_ms = [len(clip) * 1000 / sample_rate for clip in clips]
+    offsets, total_ms = clip_offsets_ms(lengths_ms, interval)
+
+    track = np.zeros(int(round(total_ms * sample_rate / 1000)), dtype=np.float32)
+    for clip, offset in zip(clips, offsets):
+        start = int(round(offset * sample_rate / 1000))
+        track[start:start + len(clip)] = clip[:len(track) - start]
+    return track, offsets
+
+
+def resample(pcm, source_rate, target_rate):
+    # 선형 보간 리샘플링 (Whisper 입력용 16kHz 변환에 사용)
+    if source_rate == target_rate or len(pcm) == 0:
+        return pcm.astype(np.float32, copy=False)
+    target_length = int(round(len(pcm) * target_rate / source_rate))
+    source_positions = np.arange(target_length, dtype=np.float64) * source_rate / target_rate
+    return np.interp(source_positions, np.arange(len(pcm)), pcm).astype(np.float32)
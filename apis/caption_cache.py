@@ -0,0 +1,84 @@
+# 렌더링된 자막 비트맵(RGBA)을 재사용하는 캐시
+# 같은 (텍스트, 폰트, 크기, 색, 박스 크기, 방식) 자막은 한 번만 래스터화한다.
+import io
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+from moviepy.editor import TextClip
+from dotenv import load_dotenv
+from apis.disk_cache import DiskLRUCache, make_key
+from apis import caption_renderer
+
+load_dotenv()
+
+# 🔹 자막 렌더러: "pillow" (프로세스 내부 FreeType) / "imagemagick" (기존 TextClip)
+CAPTION_RENDERER = os.getenv("CAPTION_RENDERER", "pillow")
+
+# 🔹 메모리 캐시 용량 (바이트)
+CAPTION_CACHE_MAX_BYTES = int(os.getenv("CAPTION_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# 🔹 디스크 캐시 (선택, 0 이면 사용 안 함) - 재시작 / 여러 워커 간 공유
+CAPTION_DISK_CACHE_DIR = os.getenv("CAPTION_DISK_CACHE_DIR", os.path.join("cache", "captions"))
+CAPTION_DISK_CACHE_MAX_BYTES = int(os.getenv("CAPTION_DISK_CACHE_MAX_BYTES", "0"))
+
+_memory_cache = OrderedDict()  # 키 -> RGBA 배열
+_memory_bytes = 0
+_lock = threading.Lock()
+_disk_cache = DiskLRUCache(CAPTION_DISK_CACHE_DIR, CAPTION_DISK_CACHE_MAX_BYTES)
+
+
+def rasterize_caption(text, fontsize, color, font, size, method="caption", renderer=None):
+    # 자막을 그려서 RGBA uint8 배열로 반환 (Pillow 로 그릴 수 없는 폰트/방식이면 ImageMagick 사용)
+    renderer = renderer or CAPTION_RENDERER
+    if renderer == "pillow" and method == "caption":
+        font_file = caption_renderer.resolve_font_file(font)
+        if font_file is not None:
+            return caption_renderer.render_caption(text, fontsize, color, font_file, size)
+
+    txt = TextClip(text, fontsize=fontsize, color=color, font=font, size=size, method=method)
+    rgb = txt.get_frame(0)
+    alpha = np.round(txt.mask.get_frame(0) * 255)
+    return np.dstack([rgb, alpha]).astype(np.uint8)
+
+
+def _remember(key, rgba):
+    # 메모리 LRU 에 추가하고 용량을 넘으면 오래된 자막부터 제거
+    global _memory_bytes
+    with _lock:
+        if key in _memory_cache:
+            _memory_cache.move_to_end(key)
+            return
+        _memory_cache[key] = rgba
+        _memory_bytes += rgba.nbytes
+        while _memory_bytes > CAPTION_CACHE_MAX_BYTES and len(_memory_cache) > 1:
+            _, evicted = _memory_cache.popitem(last=False)
+            _memory_bytes -= evicted.nbytes
+
+
+def get_caption(text, fontsize, color, font, size, method="caption"):
+    """
+    자막 RGBA 배열 반환 (메모리 → 디스크 → 새로 렌더링 순서로 확인).
+    반환 배열은 여러 요청이 공유하므로 읽기 전용이다.
+    """
+    key = make_key(text, fontsize, color, font, list(size), method, CAPTION_RENDERER)
+
+    with _lock:
+        rgba = _memory_cache.get(key)
+        if rgba is not None:
+            _memory_cache.move_to_end(key)
+            return rgba
+
+    data = _disk_cache.get_bytes(key, ".npy")
+    if data is not None:
+        rgba = np.load(io.BytesIO(data))
+    else:
+        rgba = rasterize_caption(text, fontsize, color, font, size, method)
+        if _disk_cache.enabled:
+            buffer = io.BytesIO()
+            np.save(buffer, rgba)
+            _disk_cache.put_bytes(key, ".npy", buffer.getvalue())
+
+    rgba.setflags(write=False)
+    _remember(key, rgba)
+    return rgba
+
@@ -0,0 +1,119 @@
+# ImageMagick 프로세스를 띄우지 않고 Pillow(FreeType)로 자막을 그리는 래스터라이저
+# TextClip(method='caption') 과 같은 규칙: 박스 너비에 맞춰 줄바꿈, 가로/세로 가운데 정렬, 투명 배경
+import os
+import subprocess
+from functools import lru_cache
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont, ImageColor
+
+
+def _normalize_font_name(name):
+    return "".join(char for char in name.lower() if char.isalnum())
+
+
+def _font_names(match):
+    # fc-match 결과의 패밀리 / 전체 이름 / PostScript 이름 (언어별로 여러 개면 쉼표로 구분) + 파일 이름
+    family, fullname, postscript, path = (match.split("\n") + ["", "", "", ""])[:4]
+    names = [name for field in (family, fullname, postscript) for name in field.split(",")]
+    names.append(os.path.splitext(os.path.basename(path))[0])
+    return [_normalize_font_name(name) for name in names if name.strip()]
+
+
+@lru_cache(maxsize=128)
+def resolve_font_file(font):
+    """
+    폰트 경로 또는 이름(ImageMagick 에 넘기던 값)을 실제 폰트 파일 경로로 변환.
+    이름이면 fontconfig(fc-match)로 찾고, 찾지 못하면 None.
+    fc-match 는 없는 이름에도 대체 폰트(보통 한글이 없는 DejaVu)를 돌려주므로 이름이 맞는지 확인한다.
+    """
+    if os.path.isfile(font):
+        return font
+    try:
+        result = subprocess.run(
+            ["fc-match", "-f", "%{family}\n%{fullname}\n%{postscriptname}\n%{file}", font],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=5
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    match = result.stdout.decode("utf-8", "ignore")
+    path = (match.split("\n") + ["", "", "", ""])[3].strip()
+    if not path or not os.path.isfile(path):
+        return None
+
+    # "NanumGothic-Bold" 처럼 스타일이 붙은 이름은 패밀리 이름으로 시작하면 같은 폰트로 본다
+    requested = _normalize_font_name(font)
+    names = _font_names(match)
+    if not any(name and (requested == name or requested.startswith(name)) for name in names):
+        return None
+    return path
+
+
+@lru_cache(maxsize=256)
+def get_font(font_file, fontsize):
+    # 폰트 객체는 요청 간에 재사용 (파일 파싱 비용 절약)
+    return ImageFont.truetype(font_file, fontsize)
+
+
+def _split_long_word(word, font, max_width):
+    # 한 단어가 박스보다 넓으면 글자 단위로 나눔
+    pieces, current = [], ""
+    for char in word:
+        if current and font.getlength(current + char) > max_width:
+            pieces.append(current)
+            current = char
+        else:
+            current += char
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def wrap_text(text, font, max_width):
+    # 단어 단위 greedy 줄바꿈 (입력의 줄바꿈은 유지)
+    lines = []
+    for paragraph in text.split("\n"):
+        current = ""
+        for word in paragraph.split():
+            candidate = f"{current} {word}" if current else word
+            if font.getlength(candidate) <= max_width:
+                current = candidate
+                continue
+            if current:
+                lines.append(current)
+            if font.getlength(word) > max_width:
+                *full_pieces, current = _split_long_word(word, font, max_width)
+                lines.extend(full_pieces)
+            else:
+                current = word
+        lines.append(current)
+    return lines
+
+
+def render_caption(text, fontsize, color, font_file, size):
+    """
+    자막을 RGBA uint8 배열 (H, W, 4) 로 렌더링.
+    size: (너비, 높이) - 높이가 None 이면 글자 높이에 맞춤
+    """
+    font = get_font(font_file, fontsize)
+    width, height = size
+    lines = wrap_text(text, font, width)
+
+    ascent, descent = font.getmetrics()
+    line_height = ascent + descent
+    text_height = line_height * len(lines)
+    if height is None:
+        height = text_height
+
+    # 글자 모양은 알파 마스크(L)로만 그리고, 색은 한 번에 채움
+    mask = Image.new("L", (width, height), 0)
+    draw = ImageDraw.Draw(mask)
+    y = (height - text_height) / 2
+    for line in lines:
+        x = (width - font.getlength(line)) / 2
+        draw.text((x, y), line, font=font, fill=255)
+        y += line_height
+
+    rgba = np.empty((height, width, 4), dtype=np.uint8)
+    rgba[:, :, :3] = ImageColor.getrgb(color)[:3]
+    rgba[:, :, 3] = np.asarray(mask)
+    return rgba
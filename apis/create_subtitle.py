@@ -1,136 +1,161 @@
 import os
-from moviepy.editor import VideoFileClip, TextClip, CompositeVideoClip
+from apis import caption_cache
+from apis import pop_animation
+from apis import subtitle_compositor
+from apis import video_readers
+
+INTERVAL = 5  # 각 클립의 예상 재생 시간 간격 (초 단위) — TTS 기준
+
+# 효과별 자막 박스 높이 (px) 와 pop 애니메이션 여부
+CAPTION_STYLES = {
+    "split": {"box_height": 100 + 50, "pop": False},
+    "poping": {"box_height": 200, "pop": True},
+    "custom_poping": {"box_height": 150, "pop": True},
+}
+
+
+def caption_box_height(style, scale=1.0):
+    # 원본 해상도 기준 박스 높이를 영상 크기에 맞춤 (미리보기 프록시는 원본 대비 비율로 줄임)
+    return max(1, int(round(CAPTION_STYLES[style]["box_height"] * scale)))
+
+
+def clip_local_timings(timings, clip_start_time, clip_duration):
+    # 전체 타임라인 기준 자막 타이밍을 클립 기준으로 바꾸고, 영상 범위를 벗어난 자막은 제거
+    local_timings = []
+    for info in timings:
+        local_start = round(info["start"] - clip_start_time, 2)
+        local_end = round(info["end"] - clip_start_time, 2)
+        duration = round(local_end - local_start, 2)
+
+        if local_start < 0 or local_start >= clip_duration:
+            continue
+        if local_end > clip_duration:
+            local_end = clip_duration
+            duration = round(local_end - local_start, 2)
 
-# ✅ 문장 반 나누는 자막 생성 함수
-def create_video_with_split_subtitles(video_filenames, subtitles, durations, font_path, font_sizes, text_color, subtitle_y_positions):
-    """
-    비디오 파일들과 자막(문장 리스트)과 각 자막 duration을 받아
-    문장 반 나눠서 자막을 입힌 비디오 클립 리스트를 반환하는 함수.
-    """
-    video_clips = []
+        local_timings.append({"word": info["word"], "start": local_start, "end": local_start + duration})
+    return local_timings
 
-    for idx, video_filename in enumerate(video_filenames):
-        video_path = os.path.join("videos", video_filename)
 
-        if not os.path.exists(video_path):
-            raise FileNotFoundError(f"{video_path} 파일이 존재하지 않습니다.")
-        
-        clip = VideoFileClip(video_path)
-        subtitle_text = subtitles[idx]
-        words = subtitle_text.strip().split()
-        half = (len(words) + 1) // 2
-        font_size = font_sizes[idx]        
-        subtitle_y_position = subtitle_y_positions[idx]
+# ✅ 효과별 자막 타임라인 (클립 기준 시간) - moviepy 합성과 ASS 자막이 같은 타이밍을 사용
+def split_caption_timeline(subtitle_text, duration, clip_duration):
+    # 문장을 반으로 나눠 앞부분은 0 ~ duration, 뒷부분은 duration ~ 영상 끝까지
+    words = subtitle_text.strip().split()
+    half = (len(words) + 1) // 2
+    return [
+        {"word": " ".join(words[:half]), "start": 0, "end": duration},
+        {"word": " ".join(words[half:]), "start": duration, "end": clip_duration},
+    ]
 
-        first_sub = " ".join(words[:half])
-        second_sub = " ".join(words[half:])
 
-        duration = durations[idx]
+def word_caption_timeline(subtitle_text, whisper_word_timings, idx, clip_duration):
+    subtitle_words = subtitle_text.strip().split()
 
-        first_subtitle = (
-            TextClip(
-                first_sub,
-                fontsize=font_size,
-                color=text_color,
-                font=font_path,
-                size=(clip.w, 100 + 50),
-                method='caption'
-            )
-            .set_position(("center", subtitle_y_position))
-            .set_start(0)
-            .set_duration(duration)
-        )
+    # 1. Whisper-자막 정렬
+    aligned_word_timings = align_words_with_timings_split(subtitle_words, whisper_word_timings)
 
-        second_subtitle = (
-            TextClip(
-                second_sub,
-                fontsize=font_size,
-                color=text_color,
-                font=font_path,
-                size=(clip.w, 100 + 50),
-                method='caption'
-            )
-            .set_position(("center", subtitle_y_position))
-            .set_start(duration)
-            .set_duration(clip.duration - duration)
-        )
+    # 2. 자연스럽게 병합
+    merged_word_timings = merge_natural_korean_phrases(aligned_word_timings)
 
-        video_with_subtitles = CompositeVideoClip([clip, first_subtitle, second_subtitle])
-        video_clips.append(video_with_subtitles)
+    print(f"\n🧾 [인덱스 {idx}] 병합 전 단어 리스트:")
+    for w in aligned_word_timings:
+        print(f" - {w['word']} | {w['start']} ~ {w['end']}")
 
-    return video_clips
+    print(f"\n🧾 [인덱스 {idx}] 병합 후 자막 리스트:")
+    for w in merged_word_timings:
+        print(f"📝 {w['word']} | {w['start']} ~ {w['end']}")
 
+    return clip_local_timings(merged_word_timings, idx * INTERVAL, clip_duration)
 
-# ✅ 단어별로 튀어나오는 자막 생성 함수
-def create_video_with_word_subtitles(video_filenames, subtitles, word_timings_list, font_path, font_sizes, text_color, subtitle_y_positions):
-    """
-    자연스럽게 병합된 단어 자막을 영상에 입히는 함수
-    """
-    video_clips = []
-    interval = 5  # 각 클립의 예상 재생 시간 간격 (초 단위) — TTS 기준
 
-    for idx, video_filename in enumerate(video_filenames):
-        video_path = os.path.join("videos", video_filename)
-        if not os.path.exists(video_path):
-            raise FileNotFoundError(f"{video_path} 파일이 존재하지 않습니다.")
+def custom_caption_timeline(subtitle_chunks, whisper_word_timings, idx, clip_duration):
+    # 사용자 자막 덩어리를 Whisper 타이밍과 매칭
+    aligned_chunks = align_custom_subtitles_with_timings(subtitle_chunks, whisper_word_timings)
 
-        clip = VideoFileClip(video_path)
-        subtitle_text = subtitles[idx].strip()
-        subtitle_words = subtitle_text.split()
-        whisper_word_timings = word_timings_list[idx]
-        font_size = font_sizes[idx]                
-        subtitle_y_position = subtitle_y_positions[idx]        
+    print(f"\n🧾 [인덱스 {idx}] 사용자 정의 자막 타이밍:")
+    for w in aligned_chunks:
+        print(f"📝 {w['word']} | {w['start']} ~ {w['end']}")
 
-        # 1. Whisper-자막 정렬
-        aligned_word_timings = align_words_with_timings_split(subtitle_words, whisper_word_timings)
+    return clip_local_timings(aligned_chunks, idx * INTERVAL, clip_duration)
 
-        # 2. 자연스럽게 병합
-        merged_word_timings = merge_natural_korean_phrases(aligned_word_timings)
 
-        print(f"\n🧾 [인덱스 {idx}] 병합 전 단어 리스트:")
-        for w in aligned_word_timings:
-            print(f" - {w['word']} | {w['start']} ~ {w['end']}")
+def caption_timelines(font_effect, subtitles, timing_data, clip_durations):
+    """
+    효과별로 모든 클립의 자막 타임라인 생성.
+    timing_data: split 이면 앞부분 길이 리스트, 그 외에는 Whisper 단어 타이밍 리스트
+    """
+    if font_effect == "split":
+        builder = split_caption_timeline
+        return [builder(subtitles[idx], timing_data[idx], clip_durations[idx]) for idx in range(len(clip_durations))]
+    builder = custom_caption_timeline if font_effect == "custom_poping" else word_caption_timeline
+    return [builder(subtitles[idx], timing_data[idx], idx, clip_durations[idx]) for idx in range(len(clip_durations))]
+
+
+def composite_caption_timeline(clip, timeline, font_path, font_size, text_color, subtitle_y_position, style,
+                               box_height=None):
+    # 타임라인의 자막을 렌더링(캐시)해서 영상에 합성 (box_height 가 없으면 효과별 기본 높이)
+    if box_height is None:
+        box_height = caption_box_height(style)
+    events = []
+    for caption in timeline:
+        txt = caption_cache.get_caption(
+            caption["word"],
+            fontsize=font_size,
+            color=text_color,
+            font=font_path,
+            size=(clip.w, box_height),
+            method='caption'
+        )
+        # pop 애니메이션 (0.2초 동안 0.3배 → 1배) 프레임은 합성기가 미리 계산해서 재사용
+        events.append(subtitle_compositor.caption_event(
+            txt, caption["start"], caption["end"], subtitle_y_position, pop=CAPTION_STYLES[style]["pop"]
+        ))
 
-        print(f"\n🧾 [인덱스 {idx}] 병합 후 자막 리스트:")
-        for w in merged_word_timings:
-            print(f"📝 {w['word']} | {w['start']} ~ {w['end']}")
+    # 영상 + 자막 합성 (자막이 있는 행만 블렌딩)
+    return subtitle_compositor.composite_captions(clip, events)
 
 
-        # 3. 자막 클립 생성
-        clip_start_time = idx * interval
-        word_clips = []
+def _open_segment(video_filename):
+    video_path = os.path.join("videos", video_filename)
+    if not os.path.exists(video_path):
+        raise FileNotFoundError(f"{video_path} 파일이 존재하지 않습니다.")
+    # 렌더링 세션이 끝나면 닫히는 리더 (동시에 열 수 있는 수 제한)
+    return video_readers.open_video(video_path)
 
-        for word_info in merged_word_timings:
-            global_start = word_info["start"]
-            global_end = word_info["end"]
-            local_start = round(global_start - clip_start_time, 2)
-            local_end = round(global_end - clip_start_time, 2)
-            duration = round(local_end - local_start, 2)
 
-            # 영상 범위 벗어난 자막 제거
-            if local_start < 0 or local_start >= clip.duration:
-                continue
-            if local_end > clip.duration:
-                local_end = clip.duration
-                duration = round(local_end - local_start, 2)
+# ✅ 문장 반 나누는 자막 생성 함수
+def create_video_with_split_subtitles(video_filenames, subtitles, durations, font_path, font_sizes, text_color, subtitle_y_positions,
+                                      box_heights=None):
+    """
+    비디오 파일들과 자막(문장 리스트)과 각 자막 duration을 받아
+    문장 반 나눠서 자막을 입힌 비디오 클립 리스트를 반환하는 함수.
+    """
+    video_clips = []
 
-            txt = TextClip(
-                word_info["word"],
-                fontsize=font_size,
-                color=text_color,
-                font=font_path,
-                size=(clip.w, 200),
-                method='caption'
-            ).set_position(("center", subtitle_y_position))
+    for idx, video_filename in enumerate(video_filenames):
+        clip = _open_segment(video_filename)
+        timeline = split_caption_timeline(subtitles[idx], durations[idx], clip.duration)
+        video_clips.append(composite_caption_timeline(
+            clip, timeline, font_path, font_sizes[idx], text_color, subtitle_y_positions[idx], "split",
+            box_heights[idx] if box_heights else None))
+
+    return video_clips
 
-            pop = txt.resize(lambda t: 0.3 + 0.7 * (t / 0.2) if t < 0.2 else 1)
-            pop = pop.set_start(local_start).set_duration(duration)
-            pop = pop.set_start(local_start).set_duration(duration)
-            word_clips.append(pop)
 
-        # 영상 + 자막 합성
-        final = CompositeVideoClip([clip] + word_clips).set_duration(clip.duration)
-        video_clips.append(final)
+# ✅ 단어별로 튀어나오는 자막 생성 함수
+def create_video_with_word_subtitles(video_filenames, subtitles, word_timings_list, font_path, font_sizes, text_color, subtitle_y_positions,
+                                     box_heights=None):
+    """
+    자연스럽게 병합된 단어 자막을 영상에 입히는 함수
+    """
+    video_clips = []
+
+    for idx, video_filename in enumerate(video_filenames):
+        clip = _open_segment(video_filename)
+        timeline = word_caption_timeline(subtitles[idx], word_timings_list[idx], idx, clip.duration)
+        video_clips.append(composite_caption_timeline(
+            clip, timeline, font_path, font_sizes[idx], text_color, subtitle_y_positions[idx], "poping",
+            box_heights[idx] if box_heights else None))
 
     return video_clips
 
@@ -273,7 +298,8 @@ def align_words_with_timings_split(subtitle_words, whisper_words):
     return aligned_words
 
 
-def create_video_with_custom_chunks(video_filenames, subtitle_chunks_list, whisper_word_timings_list, font_path, font_sizes, text_color, subtitle_y_positions):
+def create_video_with_custom_chunks(video_filenames, subtitle_chunks_list, whisper_word_timings_list, font_path, font_sizes, text_color, subtitle_y_positions,
+                                    box_heights=None):
     """
     사용자가 직접 정의한 자막 덩어리 리스트를 기반으로 poping 애니메이션 자막을 생성하는 함수.
     Whisper 단어 타이밍과 매칭하여 각 덩어리의 시작/끝 시간으로 자막 처리.
@@ -286,67 +312,19 @@ def create_video_with_custom_chunks(video_filenames, subtitle_chunks_list, whisp
         font_size (int): 글자 크기
         text_color (str): 글자 색
         subtitle_y_position (int): 자막 Y축 위치 오프셋
+        box_heights (List[int]): 세그먼트별 자막 박스 높이 (없으면 효과별 기본 높이)
 
     Returns:
         List[VideoClip]: 자막이 입혀진 비디오 클립 리스트
     """
-    from moviepy.editor import VideoFileClip, TextClip, CompositeVideoClip
-
-    interval = 5  # 각 클립의 시작 시간 오프셋
     video_clips = []
 
     for idx, video_filename in enumerate(video_filenames):
-        video_path = os.path.join("videos", video_filename)
-        if not os.path.exists(video_path):
-            raise FileNotFoundError(f"{video_path} 파일이 존재하지 않습니다.")
-
-        clip = VideoFileClip(video_path)
-        subtitle_chunks = subtitle_chunks_list[idx]
-        whisper_word_timings = whisper_word_timings_list[idx]
-        font_size = font_sizes[idx]        
-        subtitle_y_position = subtitle_y_positions[idx]
-
-        # 사용자 자막 덩어리를 Whisper 타이밍과 매칭
-        aligned_chunks = align_custom_subtitles_with_timings(subtitle_chunks, whisper_word_timings)
-
-        print(f"\n🧾 [인덱스 {idx}] 사용자 정의 자막 타이밍:")
-        for w in aligned_chunks:
-            print(f"📝 {w['word']} | {w['start']} ~ {w['end']}")
-
-        # 자막 클립 생성
-        clip_start_time = idx * interval
-        word_clips = []
-
-        for chunk in aligned_chunks:
-            global_start = chunk["start"]
-            global_end = chunk["end"]
-            local_start = round(global_start - clip_start_time, 2)
-            local_end = round(global_end - clip_start_time, 2)
-            duration = round(local_end - local_start, 2)
-
-            # 범위 벗어나는 자막 제외
-            if local_start < 0 or local_start >= clip.duration:
-                continue
-            if local_end > clip.duration:
-                local_end = clip.duration
-                duration = round(local_end - local_start, 2)
-
-            txt = TextClip(
-                chunk["word"],
-                fontsize=font_size,
-                color=text_color,
-                font=font_path,
-                size=(clip.w, 150),
-                method='caption'
-            ).set_position(("center", subtitle_y_position))
-
-            pop = txt.resize(lambda t: 0.3 + 0.7 * (t / 0.2) if t < 0.2 else 1)
-            pop = pop.set_start(local_start).set_duration(duration)
-            word_clips.append(pop)
-
-        # 영상과 자막 합성
-        final = CompositeVideoClip([clip] + word_clips).set_duration(clip.duration)
-        video_clips.append(final)
+        clip = _open_segment(video_filename)
+        timeline = custom_caption_timeline(subtitle_chunks_list[idx], whisper_word_timings_list[idx], idx, clip.duration)
+        video_clips.append(composite_caption_timeline(
+            clip, timeline, font_path, font_sizes[idx], text_color, subtitle_y_positions[idx], "custom_poping",
+            box_heights[idx] if box_heights else None))
 
     return video_clips
 
@@ -390,7 +368,6 @@ def create_video_with_poping_subtitles(video_filenames, subtitles, word_timings_
     """
     글자가 작게 시작해서 커지는 팝업 애니메이션을 적용하되 선명도를 유지한 버전
     """
-    from moviepy.editor import VideoFileClip, TextClip, CompositeVideoClip
 
     video_clips = []
     interval = 5
@@ -400,7 +377,7 @@ def create_video_with_poping_subtitles(video_filenames, subtitles, word_timings_
         if not os.path.exists(video_path):
             raise FileNotFoundError(f"{video_path} 파일이 존재하지 않습니다.")
 
-        clip = VideoFileClip(video_path)
+        clip = video_readers.open_video(video_path)
         subtitle_text = subtitles[idx].strip()
         subtitle_words = subtitle_text.split()
         whisper_word_timings = word_timings_list[idx]
@@ -427,21 +404,21 @@ def create_video_with_poping_subtitles(video_filenames, subtitles, word_timings_
                 duration = round(local_end - local_start, 2)
 
             # 고해상도로 텍스트 렌더링 후 절반 크기로 기본 사이즈 설정
-            txt = TextClip(
+            txt = pop_animation.scale_rgba(caption_cache.get_caption(
                 word_info["word"],
                 fontsize=font_size * 2,
                 color=text_color,
                 font=font_path,
                 size=(clip.w * 2, 300),
                 method='caption'
-            ).resize(0.5).set_position(("center", subtitle_y_position))
+            ), 0.5)
 
-            # 팝업 애니메이션 적용 (선명도 유지)
-            pop = txt.resize(lambda t: 0.3 + 0.7 * (t / 0.2) if t < 0.2 else 1)
-            pop = pop.set_start(local_start).set_duration(duration)
-            word_clips.append(pop)
+            # 팝업 애니메이션 적용 (선명도 유지, 애니메이션 프레임은 미리 계산)
+            word_clips.append(subtitle_compositor.caption_event(
+                txt, local_start, local_start + duration, subtitle_y_position, pop=True
+            ))
 
-        final = CompositeVideoClip([clip] + word_clips).set_duration(clip.duration)
+        final = subtitle_compositor.composite_captions(clip, word_clips)
         video_clips.append(final)
 
     return video_clips
@@ -0,0 +1,153 @@
+# 내용 해시를 키로 쓰는 디스크 캐시 (용량 제한 + LRU 삭제)
+# 여러 워커 프로세스가 같은 디렉터리를 공유해도 안전하도록
+# 쓰기는 임시 파일 → os.replace 로 원자적으로 처리하고, 정리는 파일 락을 잡은 프로세스 하나만 수행한다.
+import os
+import json
+import time
+import hashlib
+import tempfile
+
+try:
+    import fcntl
+except ImportError:  # Windows 개발 환경
+    fcntl = None
+
+# 정리 검사를 건너뛰는 동안(1초) 용량을 넘겨 쓸 수 있는 양 (최대 용량 대비 비율)
+EVICT_HEADROOM_RATIO = 0.1
+
+
+def make_key(*parts):
+    # 입력값들을 JSON 으로 직렬화해서 sha256 해시 키 생성
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DiskLRUCache:
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.enabled = max_bytes > 0
+        self._last_evict_check = 0.0
+        self._unchecked_bytes = 0  # 마지막 정리 검사 이후 이 프로세스가 쓴 양
+        if self.enabled:
+            os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, key, suffix):
+        # 한 디렉터리에 파일이 너무 많아지지 않도록 키 앞 두 글자로 분산
+        return os.path.join(self.directory, key[:2], f"{key}{suffix}")
+
+    def get_path(self, key, suffix):
+        # 캐시 파일이 있으면 사용 시간을 갱신하고 경로 반환
+        if not self.enabled:
+            return None
+        path = self.path_for(key, suffix)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def get_bytes(self, key, suffix):
+        path = self.get_path(key, suffix)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:  # 다른 워커가 방금 삭제한 경우
+            return None
+
+    def get_json(self, key, suffix):
+        data = self.get_bytes(key, suffix)
+        if data is None:
+            return None
+        try:
+            return json.loads(data.decode("utf-8"))
+        except ValueError:
+            return None
+
+    def put_bytes(self, key, suffix, data):
+        if not self.enabled or data is None:
+            return None
+        path = self.path_for(key, suffix)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self._unchecked_bytes += len(data)
+        self.evict()
+        return path
+
+    def put_json(self, key, suffix, value):
+        return self.put_bytes(key, suffix, json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+    def put_file(self, key, suffix, source_path):
+        # 이미 만들어진 파일(같은 파일시스템)을 캐시로 옮김
+        if not self.enabled:
+            return None
+        path = self.path_for(key, suffix)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(source_path, path)
+        try:
+            self._unchecked_bytes += os.path.getsize(path)
+        except FileNotFoundError:  # 다른 워커가 방금 삭제한 경우
+            pass
+        self.evict()
+        return path
+
+    def _entries(self):
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".tmp") or name == ".lock":
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def total_bytes(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self, force=False):
+        # 용량 초과 시 가장 오래 사용하지 않은 파일부터 삭제
+        # (1초에 한 번만 검사하되, 그 사이 쓴 양이 여유분을 넘으면 바로 검사)
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        headroom = self.max_bytes * EVICT_HEADROOM_RATIO
+        if not force and now - self._last_evict_check < 1.0 and self._unchecked_bytes <= headroom:
+            return
+        self._last_evict_check = now
+
+        lock_file = open(os.path.join(self.directory, ".lock"), "w")
+        try:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return  # 다른 워커가 정리 중 (쓴 양은 남겨 두고 다음 쓰기에서 다시 검사)
+            self._unchecked_bytes = 0
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            if total <= self.max_bytes:
+                return
+            for _, size, path in sorted(entries):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                if total <= self.max_bytes:
+                    break
+        finally:
+            lock_file.close()
@@ -0,0 +1,138 @@
+# moviepy 를 거치지 않고 ffmpeg 한 번으로 최종 영상을 만드는 렌더러
+# 세그먼트 이어 붙이기 + ASS 자막 번인(libass) + 인코딩을 하나의 필터 그래프로 처리하거나,
+# 미리 인코딩한 세그먼트들을 재인코딩 없이 이어 붙이고 오디오만 넣는다.
+import os
+import numpy as np
+from apis import ffmpeg_utils
+from apis import rendition_ladder
+
+# moviepy write_videofile(codec="libx264", audio_codec="aac", preset="ultrafast") 와 같은 인코더 설정
+VIDEO_ENCODER_ARGS = ["-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p"]
+AUDIO_ENCODER_ARGS = ["-c:a", "aac"]
+
+
+def burn_in_available():
+    # subtitles 필터는 libass 가 포함된 ffmpeg 빌드에만 있다
+    return ffmpeg_utils.has_filter("subtitles")
+
+
+def concat_filter(count, canvas_size, fps):
+    # 크기가 다른 클립은 검은 배경 가운데에 두고 (method="compose" 와 동일), fps 를 맞춘 뒤 이어 붙임
+    width, height = canvas_size
+    chains = [
+        f"[{i}:v]pad={width}:{height}:(ow-iw)/2:(oh-ih)/2:color=black,setsar=1,fps={fps}[v{i}]"
+        for i in range(count)
+    ]
+    inputs = "".join(f"[v{i}]" for i in range(count))
+    chains.append(f"{inputs}concat=n={count}:v=1:a=0[cat]")
+    return chains
+
+
+def _audio_input(sample_rate):
+    # audio_mixer 로 미리 섞은 stereo float32 PCM 을 stdin 으로 받음
+    return ["-f", "f32le", "-ar", str(sample_rate), "-ac", "2", "-i", "pipe:0"]
+
+
+def _pcm_bytes(audio_mix):
+    return np.ascontiguousarray(audio_mix, dtype=np.float32).tobytes()
+
+
+def burn_in_render(video_paths, canvas_size, fps, duration, ass_path, fonts_dir,
+                   audio_mix, sample_rate, output_path, ladder=None):
+    """
+    세그먼트 영상들을 이어 붙이고 ASS 자막을 입혀 한 번에 인코딩.
+    오디오는 미리 섞은 배경음악 + TTS (stereo PCM) 를 stdin 으로 넘기고, 전체 길이는 duration 으로 자른다.
+    ladder: rendition_ladder.prepare() 의 (출력 폴더, 해상도 목록) 이면 같은 프레임으로 해상도별 출력도 함께 인코딩
+    """
+    count = len(video_paths)
+    subtitles = f"subtitles=filename={ffmpeg_utils.escape_filter_path(ass_path)}"
+    if fonts_dir:
+        subtitles += f":fontsdir={ffmpeg_utils.escape_filter_path(fonts_dir)}"
+
+    graph = concat_filter(count, canvas_size, fps)
+    if ladder is None:
+        graph.append(f"[cat]{subtitles}[vout]")
+    else:
+        # 자막을 입힌 프레임을 최종 영상과 해상도별 출력으로 나눠 디코딩 / 합성은 한 번만
+        graph.append(f"[cat]{subtitles},split=2[vout][vladder]")
+        graph += rendition_ladder.ladder_graph("vladder", ladder[1])
+
+    args = []
+    for path in video_paths:
+        args += ["-i", path]
+    args += _audio_input(sample_rate)
+    args += [
+        "-filter_complex", ";".join(graph),
+        "-map", "[vout]", "-map", f"{count}:a",
+        "-t", f"{duration:.3f}",
+        "-r", str(fps),
+    ]
+    args += VIDEO_ENCODER_ARGS + AUDIO_ENCODER_ARGS + ["-movflags", "+faststart", output_path]
+    if ladder is not None:
+        directory, renditions = ladder
+        args += rendition_ladder.ladder_output_args(
+            renditions, f"{count}:a", AUDIO_ENCODER_ARGS, fps, directory, duration)
+
+    ffmpeg_utils.run_ffmpeg(args, input_data=_pcm_bytes(audio_mix))
+    return output_path
+
+
+def encode_frames(frames, frame_size, fps, duration, audio_path, output_path, ladder=None):
+    """
+    moviepy 로 합성한 RGB 프레임(iter_frames)을 stdin 으로 받아 최종 영상을 인코딩.
+    ladder 가 있으면 같은 프레임을 split 해서 해상도별 출력도 함께 인코딩 (합성 / 디코딩은 한 번).
+    audio_path: AAC 로 인코딩된 최종 오디오 (그대로 복사)
+    """
+    width, height = frame_size
+    args = [
+        "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", str(fps), "-i", "pipe:0",
+        "-i", audio_path,
+    ]
+    if ladder is None:
+        args += ["-map", "0:v"]
+    else:
+        graph = ["[0:v]split=2[vout][vladder]"] + rendition_ladder.ladder_graph("vladder", ladder[1])
+        args += ["-filter_complex", ";".join(graph), "-map", "[vout]"]
+    args += ["-map", "1:a", "-t", f"{duration:.3f}"]
+    args += VIDEO_ENCODER_ARGS + ["-c:a", "copy", "-movflags", "+faststart", output_path]
+    if ladder is not None:
+        directory, renditions = ladder
+        args += rendition_ladder.ladder_output_args(renditions, "1:a", ["-c:a", "copy"], fps, directory, duration)
+
+    proc = ffmpeg_utils.open_ffmpeg(args)
+    try:
+        for frame in frames:
+            proc.stdin.write(frame.tobytes())
+    except BrokenPipeError:
+        pass  # ffmpeg 가 먼저 종료됨 → 아래에서 stderr 로 실패 원인 전달
+    finally:
+        ffmpeg_utils.finish_ffmpeg(proc)
+    return output_path
+
+
+def write_concat_list(list_path, segment_paths):
+    # concat demuxer 입력 목록 (경로의 ' 는 '\'' 로 이스케이프)
+    with open(list_path, "w", encoding="utf-8") as f:
+        for path in segment_paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+    return list_path
+
+
+def concat_and_mux(segment_paths, list_path, duration, audio_mix, sample_rate, output_path):
+    """
+    같은 인코더 설정으로 만든 세그먼트 영상들을 concat demuxer 로 재인코딩 없이(-c:v copy) 이어 붙이고
+    미리 섞은 배경음악 + TTS 오디오만 인코딩해서 넣는다.
+    """
+    write_concat_list(list_path, segment_paths)
+    args = ["-f", "concat", "-safe", "0", "-i", list_path]
+    args += _audio_input(sample_rate)
+    args += [
+        "-map", "0:v", "-map", "1:a",
+        "-c:v", "copy",
+        "-t", f"{duration:.3f}",
+    ]
+    args += AUDIO_ENCODER_ARGS + ["-movflags", "+faststart", output_path]
+
+    ffmpeg_utils.run_ffmpeg(args, input_data=_pcm_bytes(audio_mix))
+    return output_path
@@ -0,0 +1,80 @@
+# ffmpeg 바이너리를 직접 호출하는 공용 함수 모음
+import os
+import subprocess
+from functools import lru_cache
+import imageio_ffmpeg
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# 🔹 사용할 ffmpeg 실행 파일 (없으면 moviepy 와 같은 imageio-ffmpeg 내장 바이너리)
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY") or imageio_ffmpeg.get_ffmpeg_exe()
+
+
+def run_ffmpeg(args, input_data=None):
+    # ffmpeg 실행 후 stdout 반환, 실패하면 stderr 를 담아 RuntimeError 발생
+    command = [FFMPEG_BINARY, "-nostdin", "-hide_banner", "-loglevel", "error", "-y"] + list(args)
+    if input_data is not None:
+        command.remove("-nostdin")
+    result = subprocess.run(command, input=input_data, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg 실행 실패: {result.stderr.decode('utf-8', 'ignore').strip()}")
+    return result.stdout
+
+
+def open_ffmpeg(args):
+    # 입력을 stdin 으로 조금씩 흘려 넣을 ffmpeg 프로세스 (끝나면 finish_ffmpeg 로 정리)
+    command = [FFMPEG_BINARY, "-hide_banner", "-loglevel", "error", "-y"] + list(args)
+    return subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+
+def finish_ffmpeg(proc):
+    # stdin 을 닫고 종료를 기다림, 실패하면 stderr 를 담아 RuntimeError 발생
+    try:
+        proc.stdin.close()
+    except BrokenPipeError:
+        pass
+    stderr = proc.stderr.read()
+    if proc.wait() != 0:
+        raise RuntimeError(f"ffmpeg 실행 실패: {stderr.decode('utf-8', 'ignore').strip()}")
+
+
+@lru_cache(maxsize=32)
+def has_filter(name):
+    # ffmpeg 빌드에 해당 필터가 있는지 (예: subtitles 는 libass 가 포함된 빌드에만 있음)
+    try:
+        output = run_ffmpeg(["-filters"]).decode("utf-8", "ignore")
+    except (OSError, RuntimeError):
+        return False
+    return any(line.split()[1:2] == [name] for line in output.splitlines() if line.strip())
+
+
+def escape_filter_path(path):
+    # 필터 그래프 안에 넣을 경로: 옵션 값 이스케이프 후 필터 그래프 이스케이프 (2단계)
+    value = path.replace("\\", "/")
+    for char in ("'", ":"):
+        value = value.replace(char, "\\" + char)
+    for char in ("\\", "'", "[", "]", ",", ";"):
+        value = value.replace(char, "\\" + char)
+    return value
+
+
+def decode_audio(source, sample_rate, channels=1):
+    """
+    오디오 바이트(mp3 등) 또는 파일 경로를 임시 파일 없이 바로 PCM 으로 디코딩.
+    반환: float32 배열 (mono 는 (n,), 그 외는 (n, channels))
+    """
+    if isinstance(source, (bytes, bytearray)):
+        input_args, input_data = ["-i", "pipe:0"], bytes(source)
+    else:
+        input_args, input_data = ["-i", source], None
+
+    raw = run_ffmpeg(
+        input_args + ["-f", "f32le", "-acodec", "pcm_f32le", "-ac", str(channels), "-ar", str(sample_rate), "pipe:1"],
+        input_data=input_data
+    )
+    pcm = np.frombuffer(raw, dtype=np.float32)
+    if channels > 1:
+        pcm = pcm.reshape(-1, channels)
+    return pcm
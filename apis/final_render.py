@@ -0,0 +1,117 @@
+# 최종 영상 렌더 엔진 (렌더 워커 프로세스에서 실행되는 동기 렌더링 함수)
+# 워커는 이 모듈만 import 하므로 TTS / Whisper(torch) 모듈을 여기서 import 하지 않는다.
+import os
+import tempfile
+from moviepy.editor import concatenate_videoclips
+from apis import create_subtitle
+from apis import audio_mixer
+from apis import audio_track
+from apis import ass_subtitles
+from apis import ffmpeg_render
+from apis import video_readers
+from apis import segment_render
+from apis import rendition_ladder
+
+
+def render_with_moviepy(video_filenames, subtitles, timing_data, tts_track, font_path, font_sizes,
+                        font_effect, font_color, subtitle_y_positions, music_path, output_path, renditions=False,
+                        box_heights=None):
+    # 세그먼트 리더를 미리 예약하고, 렌더링이 끝나거나 실패하면 모두 닫음
+    with video_readers.render_session(readers=len(video_filenames)), tempfile.TemporaryDirectory() as work_dir:
+        video_clips = []
+        if font_effect == "poping":
+            video_clips = create_subtitle.create_video_with_word_subtitles(
+                video_filenames, subtitles, timing_data, font_path, font_sizes, font_color, subtitle_y_positions, box_heights)
+        elif font_effect == "split":
+            video_clips = create_subtitle.create_video_with_split_subtitles(
+                video_filenames, subtitles, timing_data, font_path, font_sizes, font_color, subtitle_y_positions, box_heights)
+        elif font_effect == "custom_poping":
+            video_clips = create_subtitle.create_video_with_custom_chunks(
+                video_filenames, subtitles, timing_data, font_path, font_sizes, font_color, subtitle_y_positions, box_heights)
+
+        # ✅ 모든 비디오 클립 이어 붙이기
+        final_video = concatenate_videoclips(video_clips, method="compose")
+
+        # ✅ 캐시된 배경음악 PCM + TTS 트랙을 한 번에 믹스해서 AAC 파일 하나로 인코더에 전달 (그대로 복사됨)
+        audio_mix = audio_mixer.mix_final_audio(tts_track, music_path, final_video.duration, audio_track.TRACK_SAMPLE_RATE)
+        audio_path = audio_mixer.encode_aac(os.path.join(work_dir, "audio.m4a"), audio_mix, audio_track.TRACK_SAMPLE_RATE)
+
+        if not renditions:
+            final_video.write_videofile(output_path, codec="libx264", audio=audio_path, preset="ultrafast")
+            return
+
+        # 해상도별 출력은 합성한 프레임을 그대로 ffmpeg 로 넘겨 최종 영상과 같은 실행에서 인코딩
+        ladder = rendition_ladder.prepare(output_path, final_video.size)
+        ffmpeg_render.encode_frames(
+            final_video.iter_frames(fps=final_video.fps, dtype="uint8"),
+            final_video.size, final_video.fps, final_video.duration, audio_path, output_path, ladder=ladder)
+        rendition_ladder.write_master_playlist(*ladder)
+
+
+def render_with_ffmpeg(video_filenames, subtitles, timing_data, tts_track, segments, font_path, font_sizes,
+                       font_effect, font_color, subtitle_y_positions, music_path, output_path, renditions=False):
+    # ✅ moviepy 합성과 같은 자막 타임라인을 ASS 로 써서 ffmpeg 인코딩 중에 번인
+    timelines = create_subtitle.caption_timelines(
+        font_effect, subtitles, timing_data, [segment["duration"] for segment in segments])
+    ass_segments = [
+        dict(segment, font_size=font_sizes[idx], y=subtitle_y_positions[idx], timeline=timelines[idx])
+        for idx, segment in enumerate(segments)
+    ]
+    canvas_size = (max(s["width"] for s in segments), max(s["height"] for s in segments))
+    fps = max(s["fps"] for s in segments)
+    duration = sum(s["duration"] for s in segments)
+    style = create_subtitle.CAPTION_STYLES[font_effect]
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        ass_path = os.path.join(work_dir, "captions.ass")
+        fonts_dir = ass_subtitles.write_ass(
+            ass_path, ass_segments, canvas_size, font_path, font_color, style["box_height"], style["pop"])
+        audio_mix = audio_mixer.mix_final_audio(tts_track, music_path, duration, audio_track.TRACK_SAMPLE_RATE)
+        # 해상도별 출력도 같은 ffmpeg 실행에서 자막을 입힌 프레임을 나눠 인코딩
+        ladder = rendition_ladder.prepare(output_path, canvas_size) if renditions else None
+        ffmpeg_render.burn_in_render(
+            [os.path.join("videos", filename) for filename in video_filenames],
+            canvas_size, fps, duration, ass_path, fonts_dir,
+            audio_mix, audio_track.TRACK_SAMPLE_RATE, output_path, ladder=ladder)
+        if ladder is not None:
+            rendition_ladder.write_master_playlist(*ladder)
+
+
+def render_with_segments(video_filenames, subtitles, timing_data, tts_track, segments, font_path, font_sizes,
+                         font_effect, font_color, subtitle_y_positions, music_path, output_path, timing_provider=None,
+                         renditions=False):
+    # ✅ 원본 세그먼트 형식이 서로 다르면 이어 붙일 때 재인코딩이 필요하므로 한 번에 렌더링
+    if not segment_render.can_stream_copy(segments):
+        print("⚠️ 세그먼트 크기/fps 가 서로 달라 moviepy 로 한 번에 렌더링합니다.")
+        render_with_moviepy(
+            video_filenames, subtitles, timing_data, tts_track, font_path, font_sizes,
+            font_effect, font_color, subtitle_y_positions, music_path, output_path, renditions=renditions,
+            box_heights=[segment.get("box_height") for segment in segments])
+        return
+
+    timelines = create_subtitle.caption_timelines(
+        font_effect, subtitles, timing_data, [segment["duration"] for segment in segments])
+    duration = sum(s["duration"] for s in segments)
+
+    os.makedirs(segment_render.SEGMENT_WORK_DIR, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=segment_render.SEGMENT_WORK_DIR) as work_dir:
+        jobs = [
+            segment_render.segment_job(
+                filename, timelines[idx], font_path, font_sizes[idx], font_color,
+                subtitle_y_positions[idx], font_effect, os.path.join(work_dir, f"segment_{idx}.mp4"),
+                box_height=segments[idx].get("box_height"))
+            for idx, filename in enumerate(video_filenames)
+        ]
+        # 입력이 같은 세그먼트는 캐시에서 가져오고 바뀐 세그먼트만 인코딩
+        cache_keys = [
+            segment_render.segment_cache_key(job, subtitles[idx], timing_provider)
+            for idx, job in enumerate(jobs)
+        ]
+        segment_paths = segment_render.render_segments(jobs, cache_keys)
+        audio_mix = audio_mixer.mix_final_audio(tts_track, music_path, duration, audio_track.TRACK_SAMPLE_RATE)
+        ffmpeg_render.concat_and_mux(
+            segment_paths, os.path.join(work_dir, "segments.txt"), duration,
+            audio_mix, audio_track.TRACK_SAMPLE_RATE, output_path)
+
+    if renditions:
+        rendition_ladder.render_ladder(output_path)
@@ -2,11 +2,15 @@ import requests
 import json
 import base64
 import os
-import whisper
-from pydub import AudioSegment
+from apis import whisper_registry, audio_track, ffmpeg_utils, alignment_workers, split_detector
+from apis.disk_cache import DiskLRUCache, make_key
 from dotenv import load_dotenv
 import time
+import random
 import asyncio
+import bisect
+from xml.sax.saxutils import escape
+import re
 import httpx
 
 # .env 파일 로드
@@ -15,236 +19,544 @@ load_dotenv()
 # 🔹 Google Cloud API 키
 GOOGLE_TTS_API_KEY = os.getenv("GOOGLE_TTS_API_KEY")
 
-# 🔹 API 요청 URL
-url = f"https://texttospeech.googleapis.com/v1/text:synthesize?key={GOOGLE_TTS_API_KEY}"
+# 🔹 API 요청 URL (GOOGLE_TTS_ENDPOINT 로 로컬 테스트 서버를 지정할 수 있음)
+GOOGLE_TTS_ENDPOINT = os.getenv("GOOGLE_TTS_ENDPOINT", "https://texttospeech.googleapis.com").rstrip("/")
+url = f"{GOOGLE_TTS_ENDPOINT}/v1/text:synthesize?key={GOOGLE_TTS_API_KEY}"
+# SSML <mark> 타임포인트는 v1beta1 API 에서만 제공
+mark_url = f"{GOOGLE_TTS_ENDPOINT}/v1beta1/text:synthesize?key={GOOGLE_TTS_API_KEY}"
 
-# 🔹 TTS 음성이 저장될 폴더 경로
+# 🔹 음악 / TTS 관련 파일이 저장될 폴더 경로
 output_folder = os.path.expanduser("music")
 
 # 폴더가 없으면 생성
 os.makedirs(output_folder, exist_ok=True)
 
-def get_next_filename():
-    # 현재 폴더에 저장된 TTS 파일 목록을 확인하고,
-    # 'tts_output_X.mp3' 형식의 파일명을 자동으로 증가시켜 반환하는 함수
+# 🔹 단어 타이밍 분석 방식: "sentence" (문장별 분석) / "track" (전체 트랙 1회 분석)
+WHISPER_ALIGNMENT_MODE = os.getenv("WHISPER_ALIGNMENT_MODE", "sentence")
+
+# 🔹 단어 타이밍 제공 방식: "whisper" (음성 인식) / "ssml_mark" (SSML <mark> 타임포인트)
+TIMING_PROVIDER = os.getenv("TIMING_PROVIDER", "whisper")
+
+# 🔹 split 자막 경계 검출 방식: "timing" (단어 타이밍 제공자 사용) / "energy" (PCM 에너지 기반, 애매하면 Whisper)
+SPLIT_DETECTOR = os.getenv("SPLIT_DETECTOR", "timing")
+SPLIT_MIN_CONFIDENCE = float(os.getenv("SPLIT_MIN_CONFIDENCE", "0.5"))
+
+# 🔹 Whisper 입력 샘플레이트 / 나레이션 트랙 샘플레이트 (렌더 워커와 같은 값을 쓰도록 audio_track 에 정의)
+WHISPER_SAMPLE_RATE = 16000
+TRACK_SAMPLE_RATE = audio_track.TRACK_SAMPLE_RATE
+
+# 🔹 TTS 동시 요청 수 / 재시도 설정
+TTS_MAX_CONCURRENCY = int(os.getenv("TTS_MAX_CONCURRENCY", "8"))
+TTS_MAX_RETRIES = int(os.getenv("TTS_MAX_RETRIES", "3"))
+TTS_RETRY_BACKOFF_SECONDS = float(os.getenv("TTS_RETRY_BACKOFF_SECONDS", "0.5"))
+TTS_TIMEOUT_SECONDS = float(os.getenv("TTS_TIMEOUT_SECONDS", "30"))
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+tts_semaphore = asyncio.Semaphore(TTS_MAX_CONCURRENCY)
+_http_client = None
+
+# 🔹 TTS 음성 설정 (캐시 키에도 사용)
+VOICE_NAME = "ko-KR-Wavenet-C"
+LANGUAGE_CODE = "ko-KR"
+SSML_GENDER = "MALE"
+AUDIO_ENCODING = "MP3"
+SPEAKING_RATE = 1.25
+
+# 🔹 TTS 오디오 + 단어 타이밍 캐시 (같은 대본으로 다시 만들 때 API / Whisper 호출 생략)
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join("cache", "tts"))
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))  # 0 이면 사용 안 함
+tts_cache = DiskLRUCache(TTS_CACHE_DIR, TTS_CACHE_MAX_BYTES)
+AUDIO_CACHE_SUFFIX = ".mp3"
+MARK_TIMINGS_CACHE_SUFFIX = ".marks.json"
+
+def get_http_client():
+    # 모든 TTS 요청이 함께 쓰는 keep-alive / HTTP/2 커넥션 풀 클라이언트 (처음 사용할 때 생성)
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(TTS_TIMEOUT_SECONDS),
+            limits=httpx.Limits(
+                max_connections=TTS_MAX_CONCURRENCY,
+                max_keepalive_connections=TTS_MAX_CONCURRENCY,
+                keepalive_expiry=60
+            )
+        )
+    return _http_client
 
-    existing_files = [f for f in os.listdir(output_folder) if f.startswith("tts_output") and f.endswith(".mp3")]
-    numbers = [
-        int(f.replace("tts_output_", "").replace(".mp3", ""))
-        for f in existing_files if f.replace("tts_output_", "").replace(".mp3", "").isdigit()
-    ]
-    next_number = max(numbers) + 1 if numbers else 1
-    return f"tts_output_{next_number}.mp3"
 
-async def generate_tts(text):
-    
-    # Google Cloud Text-to-Speech API를 사용하여 입력된 텍스트를 음성 데이터(MP3)로 변환하는 함수.
-    # 변환된 오디오 데이터를 반환한다.
-    
-    voice_name = "ko-KR-Wavenet-C"
-    data = {
-        "input": {"text": text},
+async def close_http_client():
+    # 서버 종료 시 커넥션 풀 정리
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def _retry_delay(attempt, response=None):
+    # Retry-After 헤더가 있으면 따르고, 없으면 지수 백오프 + 지터
+    if response is not None:
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return float(retry_after)
+    return TTS_RETRY_BACKOFF_SECONDS * (2 ** attempt) + random.uniform(0, TTS_RETRY_BACKOFF_SECONDS)
+
+
+def _tts_request_body(input_data):
+    return {
+        "input": input_data,
         "voice": {
-            "languageCode": "ko-KR",
-            "name": voice_name,
-            "ssmlGender": "MALE"
+            "languageCode": LANGUAGE_CODE,
+            "name": VOICE_NAME,
+            "ssmlGender": SSML_GENDER
         },
         "audioConfig": {
-            "audioEncoding": "MP3",
-            "speakingRate": 1.25
+            "audioEncoding": AUDIO_ENCODING,
+            "speakingRate": SPEAKING_RATE
         }
     }
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            url,
-            headers={"Content-Type": "application/json"},
-            json=data
-        )
-    
+
+
+async def _post_tts(request_url, data):
+    # TTS API 호출 (동시 요청 수 제한 + 429 / 5xx 재시도), 성공하면 응답 JSON 반환
+    async with tts_semaphore:
+        client = get_http_client()
+        for attempt in range(TTS_MAX_RETRIES + 1):
+            try:
+                response = await client.post(
+                    request_url,
+                    headers={"Content-Type": "application/json"},
+                    json=data
+                )
+            except httpx.TransportError as e:
+                if attempt == TTS_MAX_RETRIES:
+                    print(f"❌ TTS 요청 실패: {e}")
+                    return None
+                await asyncio.sleep(_retry_delay(attempt))
+                continue
+
+            if response.status_code in RETRYABLE_STATUS_CODES and attempt < TTS_MAX_RETRIES:
+                print(f"⚠️ TTS 재시도 {attempt + 1}/{TTS_MAX_RETRIES} (status {response.status_code})")
+                await asyncio.sleep(_retry_delay(attempt, response))
+                continue
+            break
+
     if response.status_code == 200:
-        response_data = response.json()
-        audio_content = response_data["audioContent"]
-        return base64.b64decode(audio_content)
+        return response.json()
     else:
         print(f"❌ 오류 발생: {response.text}")
         return None
 
 
+async def generate_tts(text):
+    
+    # Google Cloud Text-to-Speech API를 사용하여 입력된 텍스트를 음성 데이터(MP3)로 변환하는 함수.
+    # 변환된 오디오 데이터를 반환한다.
+    # 동시 요청 수는 TTS_MAX_CONCURRENCY 로 제한되고, 429 / 5xx 는 백오프 후 재시도한다.
+    # 같은 문장 / 음성 설정으로 만든 적이 있으면 캐시된 오디오를 바로 반환한다.
 
-# 문장을 단어 기준으로 앞/뒤로 분리하는 함수 (홀수는 앞부분이 더 많게)
-def split_sentence(sentence):
-    words = sentence.strip().split()
-    mid = (len(words) + 1) // 2
-    return ' '.join(words[:mid]), ' '.join(words[mid:])
+    cache_key = tts_cache_key(text)
+    cached_audio = tts_cache.get_bytes(cache_key, AUDIO_CACHE_SUFFIX)
+    if cached_audio is not None:
+        return cached_audio
 
-# 메인 함수: 입력된 문자열 리스트를 TTS로 변환 후 합치고 duration 배열 반환
-async def text_to_speech(text_list):
-    if not isinstance(text_list, list):
-        raise ValueError("입력은 리스트 형식이어야 합니다.")
-    
-    combined_audio = AudioSegment.silent(duration=0)
-    start_time = 0
-    interval = 5000
-    front_durations = []  # 각 앞부분의 duration 저장
+    response_data = await _post_tts(url, _tts_request_body({"text": text}))
+    if response_data is None:
+        return None
+
+    audio_content = base64.b64decode(response_data["audioContent"])
+    tts_cache.put_bytes(cache_key, AUDIO_CACHE_SUFFIX, audio_content)
+    return audio_content
+
+
+def build_mark_ssml(words):
+    # 각 단어(또는 덩어리) 앞에 <mark name="wN"/> 을 넣고 마지막에 끝 표시 mark 추가
+    body = " ".join(f'<mark name="w{idx}"/>{escape(word)}' for idx, word in enumerate(words))
+    return f'<speak>{body}<mark name="end"/></speak>'
+
+
+def mark_timings_from_timepoints(words, timepoints):
+    """
+    TTS 타임포인트를 Whisper 와 같은 [{"word","start","end"}] 구조로 변환.
+    단어 i 는 자기 mark 에서 시작해서 다음 mark(마지막은 end mark)에서 끝난다.
+    mark 가 하나라도 빠지면 None 반환.
+    proto3 JSON 은 0 값 필드를 생략하므로 markName 만 있고 timeSeconds 가 없으면 0초로 본다.
+    """
+    times = {
+        point["markName"]: float(point.get("timeSeconds", 0.0))
+        for point in timepoints or [] if point.get("markName")
+    }
+    names = [f"w{idx}" for idx in range(len(words))] + ["end"]
+    if any(times.get(name) is None for name in names):
+        return None
+    return [
+        {
+            "word": word,
+            "start": round(times[names[idx]], 2),
+            "end": round(times[names[idx + 1]], 2)
+        }
+        for idx, word in enumerate(words)
+    ]
 
-    for idx, text in enumerate(text_list):
-        # 문장 분리
-        front_part, back_part = split_sentence(text)
 
-        # 앞부분 TTS 생성 및 분석
-        front_tts_data = await generate_tts(front_part)
-        front_temp_path = os.path.join(output_folder, f"temp_front_{idx}.mp3")
-        with open(front_temp_path, "wb") as f:
-            f.write(front_tts_data)
+async def generate_tts_with_marks(text):
+    """
+    SSML <mark> 타임포인트를 요청해서 음성과 단어 타이밍을 한 번에 받는다.
+    반환: (mp3 바이트, 문장 기준 단어 타이밍) / 타임포인트를 받지 못하면 타이밍은 None
+    """
+    words = text.strip().split()
+    ssml = build_mark_ssml(words)
+    cache_key = tts_cache_key(ssml)
+    cached_audio = tts_cache.get_bytes(cache_key, AUDIO_CACHE_SUFFIX)
+    cached_timings = tts_cache.get_json(cache_key, MARK_TIMINGS_CACHE_SUFFIX)
+    if cached_audio is not None and cached_timings is not None:
+        return cached_audio, cached_timings
+
+    data = _tts_request_body({"ssml": ssml})
+    data["enableTimePointing"] = ["SSML_MARK"]
+    response_data = await _post_tts(mark_url, data)
+    if response_data is None:
+        return None, None
 
-        front_duration = await asyncio.to_thread(analyze_audio_with_whisper, front_temp_path)
-        front_durations.append(front_duration)
+    audio_content = base64.b64decode(response_data["audioContent"])
+    word_timings = mark_timings_from_timepoints(words, response_data.get("timepoints"))
+    tts_cache.put_bytes(cache_key, AUDIO_CACHE_SUFFIX, audio_content)
+    if word_timings is not None:
+        tts_cache.put_json(cache_key, MARK_TIMINGS_CACHE_SUFFIX, word_timings)
+    return audio_content, word_timings
 
-        # 분리된 두 부분을 다시 합쳐서 최종 TTS 생성
-        merged_text = front_part + " " + back_part
-        merged_tts_data = await generate_tts(merged_text)
 
-        merged_temp_path = os.path.join(output_folder, f"temp_merged_{idx}.mp3")
-        with open(merged_temp_path, "wb") as f:
-            f.write(merged_tts_data)
+def tts_cache_key(text):
+    # 문장 + 음성 설정으로 캐시 키 생성
+    return make_key(text, VOICE_NAME, LANGUAGE_CODE, SPEAKING_RATE, AUDIO_ENCODING)
 
-        tts_audio = AudioSegment.from_mp3(merged_temp_path)
 
-        # 시작 시간 맞추기 위한 무음 추가
-        silent_gap = AudioSegment.silent(duration=max(0, start_time - len(combined_audio)))
-        if start_time >= 5000:
-            silent_gap += AudioSegment.silent(duration=500)
+def _word_timings_suffix(model_name=None):
+    # 단어 타이밍은 분석한 Whisper 모델별로 따로 저장
+    return f".words-{model_name or whisper_registry.WHISPER_MODEL_SIZE}.json"
 
-        # 최종 오디오에 추가
-        combined_audio += silent_gap + tts_audio
-        start_time += interval
 
-        # 임시 파일 정리
-        os.remove(front_temp_path)
-        os.remove(merged_temp_path)
+def get_cached_word_timings(text, model_name=None):
+    # 문장 기준(0초 시작) 단어 타이밍 캐시 조회
+    return tts_cache.get_json(tts_cache_key(text), _word_timings_suffix(model_name))
+
+
+def put_cached_word_timings(text, word_timings, model_name=None):
+    tts_cache.put_json(tts_cache_key(text), _word_timings_suffix(model_name), word_timings)
+
+
+async def get_word_timings(text, audio_file, model_name=None):
+    # 캐시에 단어 타이밍이 있으면 Whisper 분석을 생략
+    word_timings = get_cached_word_timings(text, model_name)
+    if word_timings is None:
+        word_timings = await alignment_workers.run(analyze_audio_words_with_whisper, audio_file, model_name)
+        put_cached_word_timings(text, word_timings, model_name)
+    return word_timings
+
 
-    # 전체 길이를 5초 단위로 맞추기
-    final_length_ms = ((len(combined_audio) + 4999) // 5000) * 5000
-    if len(combined_audio) < final_length_ms:
-        padding_duration = final_length_ms - len(combined_audio)
-        combined_audio += AudioSegment.silent(duration=padding_duration)
+async def generate_tts_many(text_list):
+    # 여러 문장을 동시에 TTS 변환하고 입력 순서대로 결과 반환
+    return await asyncio.gather(*(generate_tts(text) for text in text_list))
 
-    # 최종 파일 저장
-    output_file = os.path.join(output_folder, get_next_filename())
-    combined_audio.export(output_file, format="mp3")
-    print(f"✅ TTS 음성 파일이 생성되었습니다: {output_file}")
 
-    # 파일 경로와 앞부분 duration 배열 반환
-    return output_file, front_durations
+# 🔹 단어 타이밍 제공자: 문장 하나를 받아 (트랙 샘플레이트 PCM, 문장 기준 단어 타이밍) 반환
+async def whisper_timing_provider(text, model_name=None):
+    # TTS 음성을 Whisper 로 분석해서 단어 타이밍을 구함
+    tts_data = await generate_tts(text)
+    tts_audio = await asyncio.to_thread(decode_tts_audio, tts_data)
+    word_timings = await get_word_timings(text, to_whisper_input(tts_audio), model_name)
+    return tts_audio, word_timings
 
 
-async def text_to_speech_with_poping(text_list):
+async def ssml_mark_timing_provider(text, model_name=None):
+    # 보낸 텍스트의 단어마다 mark 를 달아 TTS 가 알려주는 시간을 그대로 사용 (음성 인식 없음)
+    tts_data, word_timings = await generate_tts_with_marks(text)
+    if tts_data is None or word_timings is None:
+        print(f"⚠️ SSML mark 타임포인트를 받지 못해 Whisper 로 대체합니다: {text}")
+        return await whisper_timing_provider(text, model_name)
+    tts_audio = await asyncio.to_thread(decode_tts_audio, tts_data)
+    return tts_audio, word_timings
+
+
+TIMING_PROVIDERS = {
+    "whisper": whisper_timing_provider,
+    "ssml_mark": ssml_mark_timing_provider,
+}
+
+
+async def synthesize_with_timings(text_list, provider=None, model_name=None):
+    # 모든 문장을 동시에 처리하고 입력 순서대로 [(PCM, 단어 타이밍), ...] 반환
+    provider = provider or TIMING_PROVIDER
+    if provider not in TIMING_PROVIDERS:
+        raise ValueError(f"지원하지 않는 타이밍 제공자입니다: {provider}")
+    provider_func = TIMING_PROVIDERS[provider]
+    return await asyncio.gather(*(provider_func(text, model_name) for text in text_list))
+
+
+# 🔹 파이프라인 렌더링용 단계 함수: 문장 하나씩 TTS → 단어 타이밍 단계를 따로 진행
+async def synthesize_sentence(text, provider=None):
     """
-    텍스트 리스트를 받아 TTS 오디오 파일 생성 + 단어별 타이밍 분석 (poping 스타일)
-    반환: (TTS 파일 경로, 모든 단어 타이밍 리스트)
+    TTS 단계: (트랙 샘플레이트 PCM, 제공자가 음성과 함께 주는 문장 기준 단어 타이밍 또는 None) 반환
+    ssml_mark 는 타임포인트를 함께 받고, whisper 는 다음 단계에서 분석한다.
     """
-    if not isinstance(text_list, list):
-        raise ValueError("입력은 리스트 형식이어야 합니다.")
+    provider = provider or TIMING_PROVIDER
+    if provider == "ssml_mark":
+        tts_data, word_timings = await generate_tts_with_marks(text)
+        if tts_data is not None and word_timings is not None:
+            return await asyncio.to_thread(decode_tts_audio, tts_data), word_timings
+        print(f"⚠️ SSML mark 타임포인트를 받지 못해 Whisper 로 대체합니다: {text}")
+    tts_data = await generate_tts(text)
+    return await asyncio.to_thread(decode_tts_audio, tts_data), None
 
-    combined_audio = AudioSegment.silent(duration=0)
-    start_time = 0  # milliseconds
-    interval = 5000  # 5초 간격
-    all_word_timings = []
-    start_time = 0  # milliseconds
-    interval = 5000  # 5초 간격
-    all_word_timings = []
 
-    for idx, text in enumerate(text_list):
-        # TTS 생성
-        tts_data = await generate_tts(text)
-        merged_temp_path = os.path.join(output_folder, f"temp_merged_{idx}.mp3")
-        with open(merged_temp_path, "wb") as f:
-            f.write(tts_data)
+async def align_sentence(text, tts_audio, word_timings=None, model_name=None):
+    # 단어 타이밍 단계: TTS 단계에서 받은 타이밍이 없으면 Whisper 로 분석 (캐시 사용)
+    if word_timings is not None:
+        return word_timings
+    return await get_word_timings(text, to_whisper_input(tts_audio), model_name)
+
+
+async def split_front_duration(idx, front_part, merged_text, tts_audio, word_timings=None, model_name=None, detector=None):
+    """
+    split 효과에서 문장 앞부분이 끝나는 시간(초).
+    energy 검출기는 PCM 에너지로 쉼을 찾고, 애매하면 단어 타이밍으로 대체한다.
+    """
+    detector = detector or SPLIT_DETECTOR
+    if detector == "energy":
+        front_duration, confidence = split_detector.detect_split_point(
+            tts_audio, TRACK_SAMPLE_RATE, front_part, merged_text
+        )
+        if confidence >= SPLIT_MIN_CONFIDENCE:
+            return front_duration
+        fallback = "제공자 단어 타이밍" if word_timings is not None else "Whisper 분석"
+        print(f"⚠️ [인덱스 {idx}] 경계 신뢰도 {confidence} → {fallback}으로 대체")
+
+    word_timings = await align_sentence(merged_text, tts_audio, word_timings, model_name)
+    return front_duration_from_word_timings(front_part, merged_text, word_timings, len(tts_audio) / TRACK_SAMPLE_RATE)
 
-        tts_audio = AudioSegment.from_mp3(merged_temp_path)
 
-        # Whisper 분석
-        word_timings = await asyncio.to_thread(analyze_audio_words_with_whisper, merged_temp_path)
 
-        # 🔧 start_time 보정은 오디오 결합 전에 적용해야 정확
-        adjusted_word_timings = []
+# 문장을 단어 기준으로 앞/뒤로 분리하는 함수 (홀수는 앞부분이 더 많게)
+def split_sentence(sentence):
+    words = sentence.strip().split()
+    mid = (len(words) + 1) // 2
+    return ' '.join(words[:mid]), ' '.join(words[mid:])
+
+def _normalize_for_match(text):
+    # 공백 / 문장부호를 제거해서 자막 단어와 Whisper 단어의 글자 수를 비교할 수 있게 함
+    return re.sub(r"[\W_]", "", text)
+
+
+def front_duration_from_word_timings(front_part, merged_text, word_timings, audio_duration):
+    """
+    전체 문장 오디오의 단어 타이밍에서 앞부분(front_part)이 끝나는 시간(초)을 구한다.
+    Whisper 단어의 글자 수를 누적해서 앞부분 글자 수에 도달하는 단어의 끝 시간을 사용하고,
+    단어 타이밍이 없으면 글자 수 비율로 추정한다.
+    """
+    front_chars = len(_normalize_for_match(front_part))
+    if word_timings:
+        matched_chars = 0
         for w in word_timings:
-            adjusted_word_timings.append({
-                "word": w["word"],
-                "start": round(w["start"] + start_time / 1000, 2),
-                "end": round(w["end"] + start_time / 1000, 2)
-            })
+            matched_chars += len(_normalize_for_match(w["word"]))
+            if matched_chars >= front_chars:
+                return round(w["end"], 2)
+        return round(word_timings[-1]["end"], 2)
 
-        all_word_timings.append(adjusted_word_timings)
+    total_chars = len(_normalize_for_match(merged_text)) or 1
+    return round(audio_duration * front_chars / total_chars, 2)
 
-        # 디버깅 출력
-        print(f"\n🧾 [인덱스 {idx}] 보정된 단어 타이밍:")
-        for word_info in adjusted_word_timings:
-            print(f"🗣 {word_info['word']} | ⏱ {word_info['start']}s ~ {word_info['end']}s | 길이: {round(word_info['end'] - word_info['start'], 2)}s")
 
-        # 무음 gap 삽입
-        silent_gap = AudioSegment.silent(duration=max(0, start_time - len(combined_audio)))
-        if start_time >= 5000:
-            silent_gap += AudioSegment.silent(duration=500)
+# 메인 함수: 입력된 문자열 리스트를 TTS로 변환 후 합치고 duration 배열 반환
+async def text_to_speech(text_list, model_name=None, provider=None, detector=None):
+    """
+    model_name: 단어 타이밍 분석에 쓸 Whisper 모델 (예: "base", "base-int8", 없으면 WHISPER_MODEL_SIZE)
+    provider: 단어 타이밍 제공자 ("whisper" / "ssml_mark", 없으면 TIMING_PROVIDER)
+    detector: 앞부분 경계 검출 방식 ("timing" / "energy", 없으면 SPLIT_DETECTOR)
+    반환: (TRACK_SAMPLE_RATE mono PCM 트랙, 각 문장 앞부분 duration 리스트)
+    """
+    if not isinstance(text_list, list):
+        raise ValueError("입력은 리스트 형식이어야 합니다.")
+    detector = detector or SPLIT_DETECTOR
+    
+    interval = 5000
+    front_durations = []  # 각 앞부분의 duration 저장
 
-        combined_audio += silent_gap + tts_audio
+    # 문장 분리 후 다시 합친 전체 문장 TTS 를 한 번에 동시 요청
+    split_parts = [split_sentence(text) for text in text_list]
+    merged_texts = [front_part + " " + back_part for front_part, back_part in split_parts]
+
+    if detector == "energy":
+        # 제공자가 음성과 함께 주는 타이밍(ssml_mark)도 받아 두고,
+        # PCM 에너지로 앞부분이 끝나는 쉼을 찾되 애매하면 그 타이밍(없으면 Whisper)으로 대체 (문장들을 동시에 처리)
+        results = await asyncio.gather(*(synthesize_sentence(text, provider) for text in merged_texts))
+        clips = [tts_audio for tts_audio, _ in results]
+        front_durations = list(await asyncio.gather(*(
+            split_front_duration(
+                idx, split_parts[idx][0], merged_texts[idx], tts_audio, provider_timings, model_name, detector="energy"
+            )
+            for idx, (tts_audio, provider_timings) in enumerate(results)
+        )))
+    else:
+        # 전체 문장 음성 + 단어 타이밍에서 앞부분이 끝나는 시점 계산 (앞부분 TTS 를 따로 만들지 않음)
+        results = await synthesize_with_timings(merged_texts, provider, model_name)
+        clips = [tts_audio for tts_audio, _ in results]
+        for idx, (tts_audio, word_timings) in enumerate(results):
+            front_part, _ = split_parts[idx]
+            front_durations.append(
+                front_duration_from_word_timings(
+                    front_part, merged_texts[idx], word_timings, len(tts_audio) / TRACK_SAMPLE_RATE
+                )
+            )
+
+    # 5초 슬롯 규칙으로 트랙 조립 (전체 길이는 5초 단위)
+    combined_audio, _ = audio_track.assemble_track(clips, TRACK_SAMPLE_RATE, interval)
+    print(f"✅ TTS 음성 트랙이 생성되었습니다: {len(combined_audio) / TRACK_SAMPLE_RATE:.1f}s")
+
+    # 트랙과 앞부분 duration 배열 반환
+    return combined_audio, front_durations
+
+
+async def text_to_speech_with_poping(text_list, alignment=None, model_name=None, provider=None):
+    """
+    텍스트 리스트를 받아 TTS 오디오 트랙 생성 + 단어별 타이밍 분석 (poping 스타일)
+    alignment: "sentence" (문장마다 Whisper 분석) / "track" (합쳐진 전체 트랙을 한 번에 분석)
+    model_name: 단어 타이밍 분석에 쓸 Whisper 모델 (없으면 WHISPER_MODEL_SIZE)
+    provider: 단어 타이밍 제공자 ("whisper" / "ssml_mark", 없으면 TIMING_PROVIDER)
+              track 분석은 whisper 제공자일 때만 적용된다.
+    반환: (TRACK_SAMPLE_RATE mono PCM 트랙, 모든 단어 타이밍 리스트)
+    """
+    if not isinstance(text_list, list):
+        raise ValueError("입력은 리스트 형식이어야 합니다.")
 
-        # start_time 갱신은 마지막에!
-        start_time += interval
+    alignment = alignment or WHISPER_ALIGNMENT_MODE
+    if alignment not in ("sentence", "track"):
+        raise ValueError(f"지원하지 않는 alignment 모드입니다: {alignment}")
+    provider = provider or TIMING_PROVIDER
 
-        os.remove(merged_temp_path)
+    interval = 5000  # 5초 간격
+
+    if provider == "whisper" and alignment == "track":
+        # 모든 문장 TTS 를 동시에 생성 (순서 유지) 후 PCM 으로 디코딩
+        tts_data_list = await generate_tts_many(text_list)
+        clips = await asyncio.to_thread(lambda: [decode_tts_audio(tts_data) for tts_data in tts_data_list])
+
+        # 문장 오디오를 5초 슬롯 위치에 배치 (clip_offsets: 실제 배치 위치 ms)
+        combined_audio, clip_offsets = audio_track.assemble_track(clips, TRACK_SAMPLE_RATE, interval)
+
+        cached_timings = [get_cached_word_timings(text, model_name) for text in text_list]
+        if all(word_timings is not None for word_timings in cached_timings):
+            all_word_timings = [
+                adjust_word_timings(word_timings, idx * interval)
+                for idx, word_timings in enumerate(cached_timings)
+            ]
+        else:
+            # 합쳐진 트랙을 한 번에 분석한 뒤 문장별로 다시 나눔
+            all_word_timings = await alignment_workers.run(
+                align_track_words, combined_audio, clip_offsets, interval, model_name
+            )
+            for idx, text in enumerate(text_list):
+                put_cached_word_timings(text, adjust_word_timings(all_word_timings[idx], -idx * interval), model_name)
+    else:
+        # 문장마다 음성 + 단어 타이밍을 동시에 구한 뒤 5초 슬롯 위치에 배치
+        results = await synthesize_with_timings(text_list, provider, model_name)
+        combined_audio, _ = audio_track.assemble_track(
+            [tts_audio for tts_audio, _ in results], TRACK_SAMPLE_RATE, interval
+        )
+
+        # 🔧 문장 슬롯 시작 시간(idx * interval) 기준으로 보정
+        all_word_timings = [
+            adjust_word_timings(word_timings, idx * interval)
+            for idx, (_, word_timings) in enumerate(results)
+        ]
+
+    for idx, adjusted_word_timings in enumerate(all_word_timings):
+        print_word_timings(idx, adjusted_word_timings)
 
-    # 최종 길이 정리
-    # 최종 길이 정리
-    final_length_ms = ((len(combined_audio) + 4999) // 5000) * 5000
-    if len(combined_audio) < final_length_ms:
-        combined_audio += AudioSegment.silent(duration=final_length_ms - len(combined_audio))
-        combined_audio += AudioSegment.silent(duration=final_length_ms - len(combined_audio))
+    print(f"✅ Poping 스타일 TTS 음성 트랙이 생성되었습니다: {len(combined_audio) / TRACK_SAMPLE_RATE:.1f}s")
 
-    output_file = os.path.join(output_folder, get_next_filename())
-    combined_audio.export(output_file, format="mp3")
-    print(f"✅ Poping 스타일 TTS 음성 파일이 생성되었습니다: {output_file}")
+    return combined_audio, all_word_timings
 
-    return output_file, all_word_timings
+
+def adjust_word_timings(word_timings, start_time):
+    # 문장 기준 단어 타이밍에 문장 슬롯 시작 시간(ms)을 더해 전체 기준으로 변환
+    return [
+        {
+            "word": w["word"],
+            "start": round(w["start"] + start_time / 1000, 2),
+            "end": round(w["end"] + start_time / 1000, 2)
+        }
+        for w in word_timings
+    ]
 
 
+def print_word_timings(idx, adjusted_word_timings):
+    # 디버깅 출력
+    print(f"\n🧾 [인덱스 {idx}] 보정된 단어 타이밍:")
+    for word_info in adjusted_word_timings:
+        print(f"🗣 {word_info['word']} | ⏱ {word_info['start']}s ~ {word_info['end']}s | 길이: {round(word_info['end'] - word_info['start'], 2)}s")
 
-# Whisper 모델을 통해 오디오의 앞부분 duration과 각 타이밍을 분석하고 출력하는 함수
-def analyze_audio_with_whisper(audio_file):
-    model = whisper.load_model("base") #whisper model : tiny, base, small, medium, large
-    result = model.transcribe(audio_file, word_timestamps=True)
 
-    print(f"\n🔍 [Whisper 분석 결과: {audio_file}] 🔍")
-    for idx, segment in enumerate(result["segments"]):
-        start = round(segment["start"], 2)
-        end = round(segment["end"], 2)
-        text = segment["text"]
-        print(f"⏱ 세그먼트 {idx}: {start}s ~ {end}s | 텍스트: {text}")
+def decode_tts_audio(tts_data):
+    # TTS 응답(mp3 바이트)을 트랙 샘플레이트의 mono PCM 으로 디코딩
+    return ffmpeg_utils.decode_audio(tts_data, TRACK_SAMPLE_RATE)
 
-    first_segment = result["segments"][0]
-    duration = round(first_segment["end"] - first_segment["start"], 2)
-    return duration
 
+def to_whisper_input(pcm):
+    # 트랙 PCM 을 Whisper 입력 형식(16kHz mono float32 배열)으로 변환
+    return audio_track.resample(pcm, TRACK_SAMPLE_RATE, WHISPER_SAMPLE_RATE)
 
 
-def analyze_audio_words_with_whisper(audio_file):
+def split_track_word_timings(word_timings, clip_offsets, interval=5000):
+    """
+    전체 트랙 기준 단어 타이밍을 문장별 리스트로 나눈다.
+    각 단어는 중간 지점이 속한 문장 오디오에 배정되고,
+    문장 단위 분석과 같은 기준(문장 내 시간 + idx * interval)으로 보정된다.
+    """
+    offsets = [offset / 1000 for offset in clip_offsets]
+    per_sentence = [[] for _ in clip_offsets]
+    if not offsets:
+        return per_sentence
+
+    for w in word_timings:
+        middle = (w["start"] + w["end"]) / 2
+        idx = max(0, bisect.bisect_right(offsets, middle) - 1)
+        slot_start = idx * interval / 1000
+        per_sentence[idx].append({
+            "word": w["word"],
+            "start": round(max(0.0, w["start"] - offsets[idx]) + slot_start, 2),
+            "end": round(max(0.0, w["end"] - offsets[idx]) + slot_start, 2)
+        })
+    return per_sentence
+
+
+def align_track_words(combined_audio, clip_offsets, interval=5000, model_name=None):
+    # 5초 슬롯으로 합쳐진 트랙 전체를 Whisper 로 한 번 분석 (30초 창 단위로 처리됨)
+    word_timings = analyze_audio_words_with_whisper(
+        to_whisper_input(combined_audio),
+        model_name,
+        condition_on_previous_text=False
+    )
+    return split_track_word_timings(word_timings, clip_offsets, interval)
+
+
+
+def analyze_audio_words_with_whisper(audio_file, model_name=None, **transcribe_options):
     """
     🔍 주어진 오디오 파일을 Whisper로 분석해서
     단어 단위 (word-level)로 (단어, 시작시간, 끝시간) 정보를 리스트로 반환하는 함수.
 
     Args:
-        audio_file (str): 분석할 오디오 파일 경로 (.mp3)
+        audio_file (str | np.ndarray): 분석할 오디오 파일 경로 (.mp3) 또는 16kHz mono 배열
+        model_name (str): 사용할 Whisper 모델 (예: "base", "base-int8", 없으면 WHISPER_MODEL_SIZE)
+        **transcribe_options: Whisper transcribe 에 그대로 전달할 추가 옵션
 
     Returns:
         List[dict]: 각 단어별 정보 리스트
             예: [{"word": "Hello", "start": 0.5, "end": 0.8}, ...]
     """
 
-    # Whisper 모델 로드 (medium 모델 사용)
-    model = whisper.load_model("base")  #whisper model : tiny, base, small, medium, large
-
-    # 오디오를 word timestamps 옵션을 켜고 변환
-    result = model.transcribe(audio_file, word_timestamps=True)
+    # 공유 Whisper 모델로 word timestamps 옵션을 켜고 변환
+    result = whisper_registry.transcribe(audio_file, model_name, word_timestamps=True, **transcribe_options)
 
     word_timings = []
 
@@ -0,0 +1,139 @@
+# 영상 메타데이터(크기, fps, 길이, 코덱) 조회 캐시
+# VideoFileClip 을 열면 ffmpeg 리더 프로세스가 뜨고 디코딩 준비까지 하므로,
+# 레이아웃 계산처럼 메타데이터만 필요한 곳은 `ffmpeg -i` 출력만 파싱해서 (경로, 크기, 수정 시각) 기준으로 캐시한다.
+import os
+import re
+import subprocess
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+from apis.disk_cache import DiskLRUCache, make_key
+from apis import ffmpeg_utils
+
+load_dotenv()
+
+# 🔹 디스크 캐시 (재시작 / 여러 워커 간 공유, 0 이면 메모리 캐시만 사용)
+MEDIA_PROBE_CACHE_DIR = os.getenv("MEDIA_PROBE_CACHE_DIR", os.path.join("cache", "media_probe"))
+MEDIA_PROBE_CACHE_MAX_BYTES = int(os.getenv("MEDIA_PROBE_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+MEDIA_PROBE_MEMORY_ENTRIES = 1024
+PROBE_CACHE_SUFFIX = ".probe.json"
+
+_memory_cache = OrderedDict()  # 키 -> 메타데이터 dict
+_lock = threading.Lock()
+_disk_cache = DiskLRUCache(MEDIA_PROBE_CACHE_DIR, MEDIA_PROBE_CACHE_MAX_BYTES)
+_stats = {"hits": 0, "disk_hits": 0, "probes": 0}
+
+
+def _probe_key(path):
+    # 파일이 바뀌면(크기 / 수정 시각) 키도 바뀌므로 따로 무효화할 필요가 없다
+    stat = os.stat(path)
+    return make_key(os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+
+def parse_ffmpeg_info(output):
+    """
+    `ffmpeg -i` 의 stderr 에서 첫 번째 영상/오디오 스트림 정보를 추출.
+    moviepy(ffmpeg_parse_infos) 와 같은 규칙: fps 가 없으면 tbr 사용, 90/270도 회전이면 가로/세로 교환.
+    """
+    info = {
+        "width": None, "height": None, "fps": None, "duration": None,
+        "video_codec": None, "pix_fmt": None, "audio_codec": None, "audio_sample_rate": None,
+        "comment": None,
+    }
+
+    match = re.search(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)", output)
+    if match:
+        hours, minutes, seconds = match.groups()
+        info["duration"] = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+    # 컨테이너 comment 메타데이터 (segment_normalize 가 정규화 프로필을 기록)
+    match = re.search(r"^\s*comment\s*:\s*(.*?)\s*$", output, re.MULTILINE)
+    if match:
+        info["comment"] = match.group(1)
+
+    video_line = next((line for line in output.splitlines() if re.search(r"Stream #.*: Video:", line)), None)
+    if video_line:
+        match = re.search(r"Video: (\w+)[^,]*, (\w+)", video_line)
+        if match:
+            info["video_codec"], info["pix_fmt"] = match.groups()
+        match = re.search(r" (\d+)x(\d+)[,\s]", video_line)
+        if match:
+            info["width"], info["height"] = int(match.group(1)), int(match.group(2))
+        match = re.search(r"([\d.]+)k? fps", video_line) or re.search(r"([\d.]+)k? tbr", video_line)
+        if match:
+            info["fps"] = float(match.group(1))
+
+    rotation = re.search(r"rotate\s*:\s*(-?\d+)", output) or re.search(r"rotation of (-?[\d.]+) degrees", output)
+    if rotation and info["width"] and int(float(rotation.group(1))) % 180 != 0:
+        info["width"], info["height"] = info["height"], info["width"]
+
+    audio_line = next((line for line in output.splitlines() if re.search(r"Stream #.*: Audio:", line)), None)
+    if audio_line:
+        match = re.search(r"Audio: (\w+)", audio_line)
+        info["audio_codec"] = match.group(1) if match else None
+        match = re.search(r"(\d+) Hz", audio_line)
+        info["audio_sample_rate"] = int(match.group(1)) if match else None
+
+    return info
+
+
+def _run_probe(path):
+    # 출력 파일 없이 `ffmpeg -i` 만 실행하면 정보만 출력하고 종료 (종료 코드는 1)
+    result = subprocess.run(
+        [ffmpeg_utils.FFMPEG_BINARY, "-hide_banner", "-nostdin", "-i", path],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    info = parse_ffmpeg_info(result.stderr.decode("utf-8", "ignore"))
+    if info["width"] is None or info["duration"] is None:
+        raise RuntimeError(f"영상 정보를 읽을 수 없습니다: {path}")
+    return info
+
+
+def _remember(key, info):
+    with _lock:
+        _memory_cache[key] = info
+        _memory_cache.move_to_end(key)
+        while len(_memory_cache) > MEDIA_PROBE_MEMORY_ENTRIES:
+            _memory_cache.popitem(last=False)
+
+
+def get_media_info(path):
+    """
+    영상 메타데이터 반환 (메모리 → 디스크 → ffmpeg 순서로 확인).
+    반환: {"width", "height", "fps", "duration", "video_codec", "pix_fmt", "audio_codec", "audio_sample_rate", "comment"}
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"❌ Video file not found: {path}")
+    key = _probe_key(path)
+
+    with _lock:
+        info = _memory_cache.get(key)
+        if info is not None:
+            _memory_cache.move_to_end(key)
+            _stats["hits"] += 1
+            return dict(info)
+
+    info = _disk_cache.get_json(key, PROBE_CACHE_SUFFIX)
+    if info is not None:
+        _stats["disk_hits"] += 1
+    else:
+        info = _run_probe(path)
+        _stats["probes"] += 1
+        _disk_cache.put_json(key, PROBE_CACHE_SUFFIX, info)
+
+    _remember(key, info)
+    return dict(info)
+
+
+def prime(path):
+    # 다운로드 직후 미리 조회해 캐시를 채움 (실패해도 렌더링 시점에 다시 시도하므로 로그만 남김)
+    try:
+        return get_media_info(path)
+    except (OSError, RuntimeError) as e:
+        print(f"⚠️ 영상 정보 조회 실패 ({path}): {e}")
+        return None
+
+
+def cache_stats():
+    with _lock:
+        return dict(_stats, entries=len(_memory_cache))
@@ -0,0 +1,32 @@
+# 자막 "pop" 애니메이션 (0.3배 → 1배, 0.2초) 을 미리 계산해 두는 함수 모음
+# txt.resize(lambda t: ...) 는 매 프레임마다 자막 비트맵을 다시 리샘플링하지만,
+# 실제로 크기가 변하는 것은 처음 0.2초의 몇 프레임뿐이므로 그 프레임만 한 번 만들어 재사용한다.
+import math
+import numpy as np
+from PIL import Image
+
+POP_DURATION = 0.2
+POP_START_SCALE = 0.3
+
+
+def pop_scale(t):
+    # 기존 resize 람다와 같은 배율
+    return POP_START_SCALE + (1 - POP_START_SCALE) * (t / POP_DURATION) if t < POP_DURATION else 1
+
+
+def scale_rgba(rgba, scale):
+    # RGBA 비트맵을 배율만큼 리샘플링 (moviepy resize 처럼 크기는 int 로 버림)
+    h, w = rgba.shape[:2]
+    new_size = (max(1, int(w * scale)), max(1, int(h * scale)))
+    return np.asarray(Image.fromarray(rgba, "RGBA").resize(new_size, Image.LANCZOS))
+
+
+def pop_rgba_frames(rgba, fps):
+    # 출력 fps 기준 애니메이션 구간(0.2초)의 RGBA 프레임들 (이후는 원본 rgba 그대로)
+    ramp_frames = int(math.ceil(POP_DURATION * fps - 1e-9))
+    return [scale_rgba(rgba, pop_scale(k / fps)) for k in range(ramp_frames)]
+
+
+def frame_index(t, fps):
+    # 자막 시작 기준 시간 t 가 몇 번째 출력 프레임인지
+    return int(t * fps + 1e-6)
@@ -0,0 +1,86 @@
+# 미리보기 렌더링용 저해상도 프록시 영상
+# 폰트 / 색 / 자막 위치 / 효과를 바꿔 가며 확인할 때마다 원본 해상도로 인코딩하지 않도록
+# 세그먼트마다 낮은 해상도 / fps 로 한 번 줄여 둔 영상을 캐시에 두고 미리보기 렌더링의 입력으로 사용한다.
+import os
+import asyncio
+import tempfile
+from dotenv import load_dotenv
+from apis import ffmpeg_utils
+from apis import segment_render
+from apis.disk_cache import DiskLRUCache, make_key
+
+load_dotenv()
+
+# 🔹 프록시 영상 높이 / fps / 화질 (CRF 가 클수록 저화질, 빠름)
+PREVIEW_HEIGHT = int(os.getenv("PREVIEW_HEIGHT", "360"))
+PREVIEW_FPS = int(os.getenv("PREVIEW_FPS", "12"))
+PREVIEW_CRF = int(os.getenv("PREVIEW_CRF", "32"))
+
+# 🔹 프록시 캐시 (원본 영상 내용 + 프록시 설정이 같으면 재사용)
+PREVIEW_CACHE_DIR = os.getenv("PREVIEW_CACHE_DIR", os.path.join("cache", "proxies"))
+PREVIEW_CACHE_MAX_BYTES = int(os.getenv("PREVIEW_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+PREVIEW_CACHE_SUFFIX = ".mp4"
+# 🔹 미리보기 렌더링 작업 폴더 (프록시를 하드 링크할 수 있도록 캐시와 같은 파일시스템)
+PREVIEW_WORK_DIR = os.getenv("PREVIEW_WORK_DIR", os.path.join("cache", "proxies_tmp"))
+
+proxy_cache = DiskLRUCache(PREVIEW_CACHE_DIR, PREVIEW_CACHE_MAX_BYTES)
+
+
+def proxy_args():
+    # 세로 PREVIEW_HEIGHT 로 줄이고 (가로는 비율 유지, 짝수), fps 를 낮춰 빠르게 인코딩
+    return [
+        "-vf", f"scale=-2:{PREVIEW_HEIGHT},fps={PREVIEW_FPS}",
+        "-c:v", "libx264", "-preset", "ultrafast", "-crf", str(PREVIEW_CRF), "-pix_fmt", "yuv420p",
+        "-an",
+    ]
+
+
+def proxy_cache_key(video_path):
+    return make_key("proxy", segment_render.source_fingerprint(video_path), proxy_args())
+
+
+def _encode_proxy(video_path, output_path):
+    ffmpeg_utils.run_ffmpeg(["-i", video_path] + proxy_args() + [output_path])
+
+
+def prepare_proxy(video_filename, output_path):
+    """
+    videos/ 의 세그먼트 하나에 대한 프록시를 output_path 에 준비.
+    캐시에 있으면 연결만 하고, 없으면 인코딩해서 캐시에 저장한다.
+    (작업 폴더로 연결해 두면 렌더링 도중 캐시에서 지워져도 안전)
+    """
+    video_path = os.path.join("videos", video_filename)
+    key = proxy_cache_key(video_path)
+
+    cached_path = proxy_cache.get_path(key, PREVIEW_CACHE_SUFFIX)
+    if cached_path is not None:
+        try:
+            segment_render.link_or_copy(cached_path, output_path)
+            return output_path
+        except FileNotFoundError:  # 다른 워커가 방금 삭제한 경우
+            pass
+
+    _encode_proxy(video_path, output_path)
+    if proxy_cache.enabled:
+        fd, temp_path = tempfile.mkstemp(dir=proxy_cache.directory, suffix=".tmp")
+        os.close(fd)
+        os.remove(temp_path)
+        try:
+            segment_render.link_or_copy(output_path, temp_path)
+            proxy_cache.put_file(key, PREVIEW_CACHE_SUFFIX, temp_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    return output_path
+
+
+async def prepare_proxies(video_filenames, work_dir):
+    """
+    세그먼트 프록시들을 work_dir 에 동시에 준비하고 입력 순서대로 절대 경로 반환.
+    절대 경로는 os.path.join("videos", ...) 를 거쳐도 그대로이므로 렌더러에 파일 이름 대신 넘길 수 있다.
+    """
+    work_dir = os.path.abspath(work_dir)
+    return await asyncio.gather(*(
+        asyncio.to_thread(prepare_proxy, filename, os.path.join(work_dir, f"proxy_{idx}.mp4"))
+        for idx, filename in enumerate(video_filenames)
+    ))
@@ -0,0 +1,151 @@
+# 세그먼트 단위 파이프라인 렌더링
+# 모든 문장의 TTS / 단어 타이밍이 끝난 뒤에 인코딩을 시작하는 대신,
+# 세그먼트마다 TTS → 단어 타이밍 → 자막 합성 + 인코딩 단계를 준비되는 대로 진행한다.
+# 단계 사이는 크기가 정해진 asyncio.Queue 로 연결해서 앞 단계가 너무 앞서 나가지 않게 한다.
+import os
+import asyncio
+import tempfile
+from dotenv import load_dotenv
+from apis import googleTTS as tts
+from apis import alignment_workers
+from apis import audio_track
+from apis import audio_mixer
+from apis import create_subtitle
+from apis import ffmpeg_render
+from apis import segment_render
+from apis import rendition_ladder
+
+load_dotenv()
+
+# 🔹 단계 사이 대기열 크기 (앞 단계가 다음 단계보다 최대 몇 세그먼트 앞설 수 있는지)
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "2"))
+# 🔹 단계별 동시 처리 수
+PIPELINE_TTS_CONCURRENCY = int(os.getenv("PIPELINE_TTS_CONCURRENCY", str(tts.TTS_MAX_CONCURRENCY)))
+PIPELINE_ALIGN_CONCURRENCY = int(os.getenv("PIPELINE_ALIGN_CONCURRENCY", str(max(1, alignment_workers.ALIGNMENT_WORKERS))))
+PIPELINE_ENCODE_CONCURRENCY = int(os.getenv("PIPELINE_ENCODE_CONCURRENCY", str(max(1, segment_render.SEGMENT_WORKERS))))
+
+INTERVAL_MS = 5000
+
+
+async def _run_stage(func, inbox, outbox, concurrency):
+    # inbox 에서 세그먼트를 꺼내 func 처리 후 outbox 로 넘김 (None 은 입력 끝 표시)
+    async def worker():
+        while True:
+            item = await inbox.get()
+            if item is None:
+                await inbox.put(None)  # 같은 단계의 다른 작업자도 끝나도록
+                return
+            await func(item)
+            if outbox is not None:
+                await outbox.put(item)
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    if outbox is not None:
+        await outbox.put(None)
+
+
+async def _feed(items, queue):
+    for item in items:
+        await queue.put(item)
+    await queue.put(None)
+
+
+async def render_pipelined(video_filenames, subtitles, segments, font_path, font_sizes, font_effect,
+                           font_color, subtitle_y_positions, music_path, output_path,
+                           alignment_model=None, timing_provider=None, renditions=False):
+    """
+    세그먼트별로 TTS / 단어 타이밍 / 자막 합성 + 인코딩을 겹쳐 진행한 뒤,
+    인코딩된 세그먼트를 재인코딩 없이 이어 붙이고 TTS 트랙 + 배경음악을 넣는다.
+    segments: 세그먼트별 media_probe 정보 (모두 같은 크기 / fps 여야 함)
+    """
+    provider = timing_provider or tts.TIMING_PROVIDER
+    if provider not in tts.TIMING_PROVIDERS:
+        raise ValueError(f"지원하지 않는 타이밍 제공자입니다: {provider}")
+    style = font_effect
+
+    os.makedirs(segment_render.SEGMENT_WORK_DIR, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=segment_render.SEGMENT_WORK_DIR) as work_dir:
+        items = []
+        for idx, filename in enumerate(video_filenames):
+            subtitle = subtitles[idx]
+            if font_effect == "split":
+                front_part, back_part = tts.split_sentence(subtitle)
+                tts_text = front_part + " " + back_part
+            elif font_effect == "custom_poping":
+                front_part, tts_text = None, " ".join(subtitle)
+            else:
+                front_part, tts_text = None, subtitle
+            items.append({
+                "idx": idx,
+                "filename": filename,
+                "subtitle": subtitle,
+                "tts_text": tts_text,
+                "front_part": front_part,
+                "output_path": os.path.join(work_dir, f"segment_{idx}.mp4"),
+            })
+
+        async def tts_stage(item):
+            item["pcm"], item["provider_timings"] = await tts.synthesize_sentence(item["tts_text"], provider)
+
+        async def alignment_stage(item):
+            idx = item["idx"]
+            if font_effect == "split":
+                item["timing"] = await tts.split_front_duration(
+                    idx, item["front_part"], item["tts_text"], item["pcm"],
+                    item["provider_timings"], alignment_model
+                )
+                return
+            word_timings = await tts.align_sentence(
+                item["tts_text"], item["pcm"], item["provider_timings"], alignment_model)
+            # 🔧 문장 슬롯 시작 시간(idx * interval) 기준으로 보정
+            item["timing"] = tts.adjust_word_timings(word_timings, idx * INTERVAL_MS)
+            tts.print_word_timings(idx, item["timing"])
+
+        async def encode_stage(item):
+            idx = item["idx"]
+            duration = segments[idx]["duration"]
+            if font_effect == "split":
+                timeline = create_subtitle.split_caption_timeline(item["subtitle"], item["timing"], duration)
+            elif font_effect == "custom_poping":
+                timeline = create_subtitle.custom_caption_timeline(item["subtitle"], item["timing"], idx, duration)
+            else:
+                timeline = create_subtitle.word_caption_timeline(item["subtitle"], item["timing"], idx, duration)
+
+            job = segment_render.segment_job(
+                item["filename"], timeline, font_path, font_sizes[idx], font_color,
+                subtitle_y_positions[idx], style, item["output_path"], box_height=segments[idx].get("box_height"))
+            cache_key = await asyncio.to_thread(segment_render.segment_cache_key, job, item["subtitle"], provider)
+            await segment_render.render_segment_async(job, cache_key)
+            print(f"🎞️ [인덱스 {idx}] 세그먼트 인코딩 완료")
+
+        tts_queue = asyncio.Queue(PIPELINE_QUEUE_SIZE)
+        alignment_queue = asyncio.Queue(PIPELINE_QUEUE_SIZE)
+        encode_queue = asyncio.Queue(PIPELINE_QUEUE_SIZE)
+        stages = [
+            asyncio.ensure_future(_feed(items, tts_queue)),
+            asyncio.ensure_future(_run_stage(tts_stage, tts_queue, alignment_queue, PIPELINE_TTS_CONCURRENCY)),
+            asyncio.ensure_future(_run_stage(alignment_stage, alignment_queue, encode_queue, PIPELINE_ALIGN_CONCURRENCY)),
+            asyncio.ensure_future(_run_stage(encode_stage, encode_queue, None, PIPELINE_ENCODE_CONCURRENCY)),
+        ]
+        try:
+            await asyncio.gather(*stages)
+        except BaseException:
+            # 한 단계가 실패하면 나머지 단계도 중단 (대기열에서 멈춰 있지 않도록)
+            for stage in stages:
+                stage.cancel()
+            await asyncio.gather(*stages, return_exceptions=True)
+            raise
+
+        # ✅ 5초 슬롯 규칙으로 TTS 트랙 조립 + 배경음악 믹스 후 세그먼트 이어 붙이기
+        duration = sum(s["duration"] for s in segments)
+        tts_track, _ = audio_track.assemble_track([item["pcm"] for item in items], tts.TRACK_SAMPLE_RATE, INTERVAL_MS)
+        audio_mix = await asyncio.to_thread(
+            audio_mixer.mix_final_audio, tts_track, music_path, duration, tts.TRACK_SAMPLE_RATE)
+        await asyncio.to_thread(
+            ffmpeg_render.concat_and_mux,
+            [item["output_path"] for item in items], os.path.join(work_dir, "segments.txt"),
+            duration, audio_mix, tts.TRACK_SAMPLE_RATE, output_path
+        )
+    if renditions:
+        await asyncio.to_thread(rendition_ladder.render_ladder, output_path)
+    return output_path
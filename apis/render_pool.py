@@ -0,0 +1,187 @@
+# 최종 영상 렌더링(자막 합성 + 인코딩)을 API 프로세스와 분리된 워커 프로세스 풀에서 실행
+# 렌더링은 수십 초 동안 CPU 와 GIL 을 점유하므로 이벤트 루프에서 실행하면 헬스 체크까지 멈춘다.
+# TTS / 단어 타이밍 분석은 지금처럼 이벤트 루프(+ 정렬 워커)에서 하고, 동기 렌더링 부분만 여기로 보낸다.
+import os
+import atexit
+import asyncio
+import threading
+import functools
+import contextvars
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from dotenv import load_dotenv
+from apis import video_readers
+
+load_dotenv()
+
+# 🔹 렌더 워커 프로세스 수 (0 이면 API 프로세스 안에서 스레드로 실행)
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", "1"))
+# 🔹 워커가 모두 바쁠 때 대기할 수 있는 렌더링 수 (넘으면 503)
+RENDER_QUEUE_SIZE = int(os.getenv("RENDER_QUEUE_SIZE", "4"))
+# 🔹 렌더링 하나를 기다리는 최대 시간 (초, 넘으면 504)
+RENDER_TIMEOUT = float(os.getenv("RENDER_TIMEOUT", "900"))
+
+_executor = None
+_pending = 0  # 제출했지만 아직 끝나지 않은 렌더링 수 (이벤트 루프에서만 변경)
+_stats = {"completed": 0, "failed": 0, "rejected": 0, "timeouts": 0}
+_reserved = contextvars.ContextVar("render_reserved", default=None)  # 이 요청이 잡은 자리 (없으면 None)
+
+
+class RenderQueueFull(RuntimeError):
+    pass
+
+
+class RenderTimeout(RuntimeError):
+    pass
+
+
+def _init_worker():
+    # 렌더 워커 프로세스 시작 시: 리더 상태 기록 + 종료할 때 이 워커가 만든 세그먼트 풀도 정리
+    # + 최종 오디오를 믹스하는 곳이 이 워커이므로 배경음악을 백그라운드에서 미리 디코딩
+    # (렌더 워커에는 Whisper(torch) 를 올리지 않도록 TTS 모듈은 import 하지 않음)
+    from apis import segment_render
+    from apis import audio_mixer
+    from apis import audio_track
+
+    video_readers.start_stats_publisher()
+    atexit.register(segment_render.shutdown_workers)
+    if audio_mixer.BGM_PRELOAD:
+        threading.Thread(
+            target=audio_mixer.preload_bgm, args=("music", audio_track.TRACK_SAMPLE_RATE), daemon=True
+        ).start()
+
+
+def _ping():
+    return os.getpid()
+
+
+def start_workers():
+    # 서버 시작 시 워커 풀 생성 (moviepy / ffmpeg 리더 상태를 물려받지 않도록 spawn 사용)
+    global _executor
+    if RENDER_WORKERS <= 0 or _executor is not None:
+        return
+    _executor = ProcessPoolExecutor(
+        max_workers=RENDER_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker
+    )
+    # 워커 프로세스는 작업이 들어올 때 생성되므로 미리 깨워서 모듈 import 시간을 첫 요청에서 빼기
+    for _ in range(RENDER_WORKERS):
+        _executor.submit(_ping)
+    print(f"🎬 렌더 워커 {RENDER_WORKERS}개 시작 (대기열 {RENDER_QUEUE_SIZE}개)")
+
+
+def shutdown_workers():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _capacity():
+    return max(1, RENDER_WORKERS) + RENDER_QUEUE_SIZE
+
+
+def check_capacity():
+    # 대기열이 찼는지 확인 (자리를 잡지는 않음)
+    if _pending >= _capacity():
+        _stats["rejected"] += 1
+        raise RenderQueueFull(f"렌더링 대기열이 가득 찼습니다 ({_pending}/{_capacity()})")
+
+
+@contextmanager
+def reserve():
+    """
+    요청 하나가 TTS 등 앞 단계 작업을 시작하기 전에 대기열 자리를 잡고, 블록이 끝나면(완료 / 실패 / 시간 초과) 반납.
+    동시에 들어온 요청들이 모두 확인만 통과한 뒤 TTS 까지 끝내고 나서 거절되지 않도록 한다.
+    블록 안의 run / run_async 는 이 자리를 사용한다.
+    블록 안의 렌더링이 시간 초과되면 자리는 계속 실행 중인 렌더링으로 넘어가 그 렌더링이 끝날 때 반납된다.
+    """
+    global _pending
+    if _reserved.get() is not None:
+        yield
+        return
+    check_capacity()
+    _pending += 1
+    slot = {"handed_off": False}
+    token = _reserved.set(slot)
+    try:
+        yield
+    finally:
+        _reserved.reset(token)
+        if not slot["handed_off"]:
+            _pending -= 1
+
+
+def _record(future):
+    if future.cancelled() or future.exception() is not None:
+        _stats["failed"] += 1
+    else:
+        _stats["completed"] += 1
+
+
+def _release(_):
+    global _pending
+    _pending -= 1
+
+
+async def _wait(future):
+    global _pending
+    future.add_done_callback(_record)
+    slot = _reserved.get()
+    if slot is None:
+        # reserve() 밖에서 호출된 경우 렌더링이 끝날 때까지 자리를 차지
+        _pending += 1
+        future.add_done_callback(_release)
+    try:
+        return await asyncio.wait_for(asyncio.shield(future), RENDER_TIMEOUT)
+    except asyncio.TimeoutError:
+        _stats["timeouts"] += 1
+        if slot is not None:
+            # 시간 초과여도 렌더링은 계속 실행되므로 요청이 잡은 자리를 렌더링이 끝날 때까지 넘김
+            # (같은 요청에서 이미 넘겼으면 이 렌더링 몫의 자리를 새로 차지)
+            if slot["handed_off"]:
+                _pending += 1
+            slot["handed_off"] = True
+            future.add_done_callback(_release)
+        raise RenderTimeout(f"렌더링이 {RENDER_TIMEOUT:.0f}초 안에 끝나지 않았습니다")
+
+
+async def run(func, *args, **kwargs):
+    """
+    렌더 함수(모듈 최상위 함수)를 워커 풀에서 실행하고 결과를 기다린다.
+    대기열이 가득 차면 RenderQueueFull, RENDER_TIMEOUT 을 넘기면 RenderTimeout.
+    시간 초과여도 이미 시작된 렌더링은 워커에서 끝까지 실행된다.
+    """
+    if _reserved.get() is None:
+        check_capacity()
+
+    loop = asyncio.get_running_loop()
+    if _executor is None:
+        future = asyncio.ensure_future(asyncio.to_thread(func, *args, **kwargs))
+    else:
+        future = loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+    return await _wait(future)
+
+
+async def run_async(func, *args, **kwargs):
+    """
+    이벤트 루프에서 진행하는 렌더링(코루틴 함수, 무거운 작업은 내부에서 워커로 보냄)을
+    run 과 같은 대기열 / 시간 제한으로 실행한다.
+    """
+    if _reserved.get() is None:
+        check_capacity()
+    return await _wait(asyncio.ensure_future(func(*args, **kwargs)))
+
+
+def queue_stats():
+    running = min(_pending, max(1, RENDER_WORKERS))
+    return dict(
+        _stats,
+        workers=RENDER_WORKERS,
+        queue_size=RENDER_QUEUE_SIZE,
+        pending=_pending,
+        running=running,
+        queued=_pending - running,
+    )
@@ -0,0 +1,145 @@
+# 최종 영상 해상도별 출력(1080p / 720p / 480p …) + HLS 스트리밍 출력
+# 해상도마다 최종 영상을 따로 다시 인코딩하지 않고, 한 번 디코딩한 프레임을 split 으로 나눠 해상도별로 인코딩하며
+# 인코딩 하나를 tee 먹서로 faststart MP4 와 HLS 세그먼트 두 곳에 동시에 쓴다.
+# 결과는 videos/<최종 영상 이름>/ 아래에 <해상도>.mp4, <해상도>.m3u8 + 세그먼트, master.m3u8 로 저장된다.
+import os
+from dotenv import load_dotenv
+from apis import ffmpeg_utils
+from apis import media_probe
+
+load_dotenv()
+
+# 🔹 만들 해상도 (짧은 변 기준, 원본보다 큰 해상도는 만들지 않음)
+RENDITION_HEIGHTS = [int(h) for h in os.getenv("RENDITION_HEIGHTS", "1080,720,480").split(",") if h.strip()]
+RENDITION_PRESET = os.getenv("RENDITION_PRESET", "veryfast")
+RENDITION_CRF = int(os.getenv("RENDITION_CRF", "23"))
+# 🔹 HLS 세그먼트 길이 (초, 모든 해상도의 키프레임을 이 간격에 맞춤)
+HLS_SEGMENT_SECONDS = int(os.getenv("HLS_SEGMENT_SECONDS", "4"))
+
+# 1080p 기준 최대 비트레이트 (kbps), 다른 해상도는 픽셀 수에 비례
+BASE_MAXRATE_KBPS = 5000
+MASTER_PLAYLIST = "master.m3u8"
+
+
+def ladder_dir(output_path):
+    # videos/final_video_1.mp4 → videos/final_video_1/
+    return os.path.splitext(output_path)[0]
+
+
+def _even(value):
+    return max(2, int(round(value / 2)) * 2)
+
+
+def plan_renditions(canvas_size):
+    """
+    원본 크기에서 만들 해상도 목록 (큰 해상도부터).
+    세로 영상도 짧은 변(가로)을 기준으로 1080p / 720p … 로 부르고, 원본보다 크게 늘리지 않는다.
+    """
+    width, height = canvas_size
+    short_side = min(width, height)
+    sizes = sorted({s for s in RENDITION_HEIGHTS if s <= short_side}, reverse=True) or [short_side]
+
+    renditions = []
+    for size in sizes:
+        scale = size / short_side
+        maxrate = max(300, int(BASE_MAXRATE_KBPS * (size / 1080) ** 2))
+        renditions.append({
+            "name": f"{size}p",
+            "width": _even(width * scale),
+            "height": _even(height * scale),
+            "maxrate_kbps": maxrate,
+        })
+    return renditions
+
+
+def ladder_graph(video_label, renditions):
+    # 디코딩 / 합성된 프레임 하나를 해상도 수만큼 나눠 각각 축소
+    outputs = "".join(f"[split{i}]" for i in range(len(renditions)))
+    chains = [f"[{video_label}]split={len(renditions)}{outputs}"]
+    chains += [
+        f"[split{i}]scale={r['width']}:{r['height']},setsar=1[r{i}]"
+        for i, r in enumerate(renditions)
+    ]
+    return chains
+
+
+def ladder_output_args(renditions, audio_map, audio_args, fps, directory, duration=None):
+    # 해상도마다 인코딩 한 번 → tee 로 faststart MP4 + HLS(VOD) 에 동시에 기록
+    gop = max(1, int(round(fps * HLS_SEGMENT_SECONDS)))
+    args = []
+    for i, r in enumerate(renditions):
+        name = r["name"]
+        mp4_path = os.path.join(directory, f"{name}.mp4")
+        playlist_path = os.path.join(directory, f"{name}.m3u8")
+        segment_pattern = os.path.join(directory, f"{name}_%03d.ts")
+        tee = (
+            f"[f=mp4:movflags=+faststart]{mp4_path}"
+            f"|[f=hls:hls_time={HLS_SEGMENT_SECONDS}:hls_playlist_type=vod"
+            f":hls_segment_filename={segment_pattern}]{playlist_path}"
+        )
+        args += ["-map", f"[r{i}]", "-map", audio_map]
+        args += [
+            "-c:v", "libx264", "-preset", RENDITION_PRESET, "-crf", str(RENDITION_CRF),
+            "-maxrate", f"{r['maxrate_kbps']}k", "-bufsize", f"{r['maxrate_kbps'] * 2}k",
+            "-pix_fmt", "yuv420p",
+            "-g", str(gop), "-keyint_min", str(gop), "-sc_threshold", "0",
+            "-r", str(fps),
+        ]
+        args += list(audio_args)
+        if duration is not None:
+            args += ["-t", f"{duration:.3f}"]
+        # 여러 먹서에 같은 스트림을 쓰므로 코덱 설정(SPS/PPS)을 전역 헤더로
+        args += ["-flags", "+global_header", "-f", "tee", tee]
+    return args
+
+
+def write_master_playlist(directory, renditions):
+    # 해상도별 HLS 재생 목록을 묶는 master.m3u8 (클라이언트가 대역폭에 맞게 선택)
+    lines = ["#EXTM3U", "#EXT-X-VERSION:3"]
+    for r in renditions:
+        bandwidth = r["maxrate_kbps"] * 1000 + 128000  # 영상 최대 비트레이트 + 오디오
+        lines.append(f"#EXT-X-STREAM-INF:BANDWIDTH={bandwidth},RESOLUTION={r['width']}x{r['height']}")
+        lines.append(f"{r['name']}.m3u8")
+    path = os.path.join(directory, MASTER_PLAYLIST)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return path
+
+
+def prepare(output_path, canvas_size):
+    # 출력 폴더를 만들고 해상도 목록 반환
+    directory = ladder_dir(output_path)
+    os.makedirs(directory, exist_ok=True)
+    return directory, plan_renditions(canvas_size)
+
+
+def render_ladder(output_path):
+    """
+    이미 만들어진 최종 영상을 한 번만 디코딩해서 해상도별 MP4 + HLS 와 master.m3u8 을 만든다.
+    세그먼트별로 따로 합성하는 segments / pipeline 엔진용 (ffmpeg / moviepy 엔진은 합성한 프레임에서 바로 만듦).
+    오디오는 어떤 코덱이 들어 있어도 HLS(mpegts) 에 넣을 수 있도록 AAC 로 다시 인코딩.
+    """
+    info = media_probe.get_media_info(output_path)
+    directory, renditions = prepare(output_path, (info["width"], info["height"]))
+    args = ["-i", output_path, "-filter_complex", ";".join(ladder_graph("0:v", renditions))]
+    args += ladder_output_args(renditions, "0:a?", ["-c:a", "aac"], info["fps"], directory)
+    ffmpeg_utils.run_ffmpeg(args)
+    write_master_playlist(directory, renditions)
+    return directory
+
+
+def published_renditions(output_filename):
+    """
+    videos/ 아래 최종 영상의 해상도별 출력 경로 (videos/ 기준 상대 경로).
+    반환: {"master": ..., "renditions": {"720p": {"mp4": ..., "hls": ...}, ...}} 또는 없으면 None
+    """
+    name = os.path.splitext(output_filename)[0]
+    directory = os.path.join("videos", name)
+    if not os.path.exists(os.path.join(directory, MASTER_PLAYLIST)):
+        return None
+    names = [filename[:-len(".mp4")] for filename in os.listdir(directory) if filename.endswith(".mp4")]
+    renditions = {
+        rendition: {"mp4": f"{name}/{rendition}.mp4", "hls": f"{name}/{rendition}.m3u8"}
+        for rendition in sorted(names, key=lambda n: int(n.rstrip("p")), reverse=True)
+    }
+    return {"master": f"{name}/{MASTER_PLAYLIST}", "renditions": renditions}
@@ -0,0 +1,139 @@
+# 다운로드한 세그먼트 영상을 하나의 표준 형식(house profile)으로 맞추는 수집 단계 정규화
+# Runway 영상 / 사용자 영상마다 해상도, fps, 코덱 설정이 다르면 최종 렌더링에서
+# concatenate_videoclips(method="compose") 가 레터박스 + 전체 재인코딩을 해야 하고 재인코딩 없는 이어 붙이기도 못 쓴다.
+# 다운로드가 끝나면 백그라운드에서 같은 해상도 / fps / 픽셀 형식 / GOP / faststart 로 변환해 원래 파일을 교체하고,
+# 컨테이너 comment 메타데이터에 프로필 id 를 남겨 media_probe 정보만으로 정규화 여부를 알 수 있게 한다.
+import os
+import asyncio
+import threading
+from dotenv import load_dotenv
+from apis import ffmpeg_utils
+from apis import media_probe
+from apis.disk_cache import make_key
+
+load_dotenv()
+
+# 🔹 다운로드 직후 정규화 여부
+NORMALIZE_ON_INGEST = os.getenv("NORMALIZE_ON_INGEST", "true").lower() == "true"
+# 🔹 표준 형식 (기본: Runway gen3a_turbo 768:1280, 24fps)
+HOUSE_WIDTH = int(os.getenv("HOUSE_WIDTH", "768"))
+HOUSE_HEIGHT = int(os.getenv("HOUSE_HEIGHT", "1280"))
+HOUSE_FPS = int(os.getenv("HOUSE_FPS", "24"))
+HOUSE_GOP_SECONDS = float(os.getenv("HOUSE_GOP_SECONDS", "2"))
+HOUSE_CRF = int(os.getenv("HOUSE_CRF", "18"))
+HOUSE_PRESET = os.getenv("HOUSE_PRESET", "veryfast")
+# 🔹 동시에 정규화할 영상 수 / 최종 렌더링이 진행 중인 정규화를 기다리는 최대 시간 (초)
+NORMALIZE_CONCURRENCY = int(os.getenv("NORMALIZE_CONCURRENCY", "2"))
+NORMALIZE_WAIT_TIMEOUT = float(os.getenv("NORMALIZE_WAIT_TIMEOUT", "120"))
+
+_semaphore = asyncio.Semaphore(max(1, NORMALIZE_CONCURRENCY))
+_tasks = {}  # 절대 경로 -> 진행 중인 정규화 작업
+_abandoned = set()  # 렌더링이 기다리다 포기한 경로 (변환이 끝나도 원본을 교체하지 않음)
+_replace_lock = threading.Lock()
+_stats = {"normalized": 0, "skipped": 0, "failed": 0, "abandoned": 0}
+
+
+def house_profile_args():
+    # 비율을 유지해 표준 크기 안에 맞추고 남는 부분은 검은 배경, GOP 고정 + 장면 전환 키프레임 없음
+    gop = max(1, int(round(HOUSE_FPS * HOUSE_GOP_SECONDS)))
+    return [
+        "-vf",
+        f"scale={HOUSE_WIDTH}:{HOUSE_HEIGHT}:force_original_aspect_ratio=decrease,"
+        f"pad={HOUSE_WIDTH}:{HOUSE_HEIGHT}:(ow-iw)/2:(oh-ih)/2:color=black,setsar=1,fps={HOUSE_FPS}",
+        "-c:v", "libx264", "-preset", HOUSE_PRESET, "-crf", str(HOUSE_CRF), "-pix_fmt", "yuv420p",
+        "-g", str(gop), "-keyint_min", str(gop), "-sc_threshold", "0",
+        "-video_track_timescale", "90000",
+        "-c:a", "aac",
+        "-movflags", "+faststart",
+    ]
+
+
+def profile_tag():
+    # 프로필 설정이 바뀌면 tag 도 바뀌므로 예전 설정으로 정규화한 영상은 다시 정규화된다
+    return "house_profile=" + make_key("house_profile", house_profile_args())[:16]
+
+
+def is_normalized(info):
+    return info.get("comment") == profile_tag()
+
+
+def normalize_file(path):
+    """
+    영상 하나를 표준 형식으로 변환해서 같은 경로에 원자적으로 교체.
+    이미 정규화된 영상은 건너뛰고, 실패하면 원본을 그대로 둔다. 반환: 변환했는지 여부
+    """
+    info = media_probe.get_media_info(path)
+    if is_normalized(info):
+        _stats["skipped"] += 1
+        return False
+
+    temp_path = path + ".normalizing.tmp"
+    try:
+        ffmpeg_utils.run_ffmpeg(
+            ["-i", path] + house_profile_args() + ["-metadata", f"comment={profile_tag()}", "-f", "mp4", temp_path])
+        with _replace_lock:
+            # 기다리던 렌더링이 이미 원본 기준으로 레이아웃을 계산했으면 교체하지 않음
+            if os.path.abspath(path) in _abandoned:
+                os.remove(temp_path)
+                _stats["abandoned"] += 1
+                return False
+            os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    # 파일이 바뀌었으므로 새 메타데이터로 캐시를 다시 채움
+    media_probe.prime(path)
+    _stats["normalized"] += 1
+    return True
+
+
+async def _normalize(path):
+    async with _semaphore:
+        try:
+            if await asyncio.to_thread(normalize_file, path):
+                print(f"📐 세그먼트 정규화 완료: {path}")
+        except (OSError, RuntimeError) as e:
+            _stats["failed"] += 1
+            print(f"⚠️ 세그먼트 정규화 실패 ({path}): {e}")
+
+
+def schedule(path):
+    # 다운로드가 끝난 영상의 정규화를 백그라운드로 시작 (요청 응답은 기다리지 않음)
+    if not NORMALIZE_ON_INGEST:
+        return None
+    key = os.path.abspath(path)
+    task = _tasks.get(key)
+    if task is not None:
+        return task
+
+    task = asyncio.ensure_future(_normalize(path))
+    _tasks[key] = task
+    task.add_done_callback(lambda _: _finished(key))
+    return task
+
+
+def _finished(key):
+    _tasks.pop(key, None)
+    with _replace_lock:
+        _abandoned.discard(key)
+
+
+async def wait_for(paths, timeout=NORMALIZE_WAIT_TIMEOUT):
+    """
+    최종 렌더링 전에 해당 영상들의 정규화가 진행 중이면 끝날 때까지 대기 (렌더링 도중 파일이 바뀌지 않도록).
+    시간 안에 끝나지 않은 정규화는 원본을 교체하지 않게 해서 레이아웃 계산과 디코딩이 같은 파일을 쓰도록 한다.
+    """
+    pending = {key: _tasks[key] for key in {os.path.abspath(path) for path in paths} if key in _tasks}
+    if not pending:
+        return
+    await asyncio.wait(pending.values(), timeout=timeout)
+    with _replace_lock:
+        for key, task in pending.items():
+            if not task.done():
+                _abandoned.add(key)
+                print(f"⚠️ 세그먼트 정규화가 {timeout:.0f}초 안에 끝나지 않아 원본으로 렌더링합니다: {key}")
+
+
+def normalize_stats():
+    return dict(_stats, pending=len(_tasks), profile=profile_tag())
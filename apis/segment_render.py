@@ -0,0 +1,227 @@
+# 5초 세그먼트마다 자막을 입혀 따로 인코딩하는 병렬 렌더러
+# 자막 타이밍이 정해지면 세그먼트끼리는 서로 독립이므로 코어 수만큼 동시에 인코딩하고,
+# 같은 인코더 설정으로 만든 중간 파일들은 concat demuxer 로 재인코딩 없이 이어 붙인다.
+import os
+import shutil
+import asyncio
+import hashlib
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dotenv import load_dotenv
+from apis import caption_cache
+from apis import create_subtitle
+from apis import render_pool
+from apis import video_readers
+from apis.disk_cache import DiskLRUCache, make_key
+
+load_dotenv()
+
+# 렌더 워커마다 자기 세그먼트 풀을 가지므로 코어를 렌더 워커 수로 나눠서 쓴다
+_CORES_PER_RENDER = max(1, (os.cpu_count() or 1) // max(1, render_pool.RENDER_WORKERS))
+# 🔹 렌더링 하나에서 동시에 인코딩할 세그먼트 수 (기본: 렌더 워커 하나에 돌아가는 코어 수)
+SEGMENT_WORKERS = int(os.getenv("SEGMENT_WORKERS", str(_CORES_PER_RENDER)))
+# 🔹 세그먼트 인코더(libx264) 하나가 쓰는 스레드 수 (여러 인코더가 코어를 나눠 쓰도록)
+SEGMENT_ENCODER_THREADS = max(1, _CORES_PER_RENDER // max(1, SEGMENT_WORKERS))
+
+# 모든 세그먼트가 같아야 stream copy 로 이어 붙일 수 있는 인코더 설정
+SEGMENT_CODEC = "libx264"
+SEGMENT_PRESET = "ultrafast"
+SEGMENT_FFMPEG_PARAMS = ["-pix_fmt", "yuv420p", "-video_track_timescale", "90000"]
+
+# 🔹 세그먼트 중간 파일 작업 폴더 (세그먼트 캐시와 같은 파일시스템)
+SEGMENT_WORK_DIR = os.getenv("SEGMENT_WORK_DIR", os.path.join("cache", "segments_tmp"))
+
+# 🔹 렌더링된 세그먼트 캐시 (자막 하나만 고쳐서 다시 렌더링할 때 바뀐 세그먼트만 인코딩, 0 이면 사용 안 함)
+SEGMENT_CACHE_DIR = os.getenv("SEGMENT_CACHE_DIR", os.path.join("cache", "segments"))
+SEGMENT_CACHE_MAX_BYTES = int(os.getenv("SEGMENT_CACHE_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+SEGMENT_CACHE_SUFFIX = ".mp4"
+
+_executor = None
+segment_cache = DiskLRUCache(SEGMENT_CACHE_DIR, SEGMENT_CACHE_MAX_BYTES)
+_fingerprints = {}  # (경로, 크기, 수정 시각) -> 원본 영상 내용 해시
+_fingerprint_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=max(1, SEGMENT_WORKERS),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=video_readers.start_stats_publisher
+        )
+    return _executor
+
+
+def shutdown_workers():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def can_stream_copy(segments):
+    # 모든 원본 세그먼트의 크기 / fps 가 같아야 중간 파일들도 같은 형식이 된다
+    return len({(s["width"], s["height"], s["fps"]) for s in segments}) == 1
+
+
+def segment_job(video_filename, timeline, font_path, font_size, text_color, subtitle_y_position, style, output_path,
+                box_height=None):
+    # 워커 프로세스로 넘길 세그먼트 작업 (피클 가능한 값만)
+    return {
+        "video_path": os.path.join("videos", video_filename),
+        "timeline": timeline,
+        "font_path": font_path,
+        "font_size": font_size,
+        "text_color": text_color,
+        "subtitle_y_position": subtitle_y_position,
+        "style": style,
+        "box_height": box_height,
+        "output_path": output_path,
+    }
+
+
+def render_segment(job):
+    # 세그먼트 하나에 자막을 합성해서 영상만(오디오 없이) 인코딩
+    with video_readers.render_session(readers=1):
+        clip = video_readers.open_video(job["video_path"])
+        captioned = create_subtitle.composite_caption_timeline(
+            clip, job["timeline"], job["font_path"], job["font_size"],
+            job["text_color"], job["subtitle_y_position"], job["style"], job.get("box_height")
+        )
+        captioned.write_videofile(
+            job["output_path"],
+            fps=clip.fps,
+            codec=SEGMENT_CODEC,
+            preset=SEGMENT_PRESET,
+            audio=False,
+            threads=SEGMENT_ENCODER_THREADS,
+            ffmpeg_params=SEGMENT_FFMPEG_PARAMS,
+            logger=None
+        )
+    return job["output_path"]
+
+
+def _render_all(jobs):
+    # 세그먼트들을 병렬로 인코딩 (하나라도 실패하면 예외 전달), 결과는 입력 순서대로
+    if len(jobs) <= 1 or SEGMENT_WORKERS <= 1:
+        return [render_segment(job) for job in jobs]
+    return list(_get_executor().map(render_segment, jobs))
+
+
+def source_fingerprint(path):
+    # 원본 영상 내용의 sha256 (파일이 바뀌지 않았으면 다시 읽지 않음)
+    stat = os.stat(path)
+    stat_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _fingerprint_lock:
+        digest = _fingerprints.get(stat_key)
+    if digest is not None:
+        return digest
+
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(chunk)
+    digest = sha.hexdigest()
+    with _fingerprint_lock:
+        _fingerprints[stat_key] = digest
+    return digest
+
+
+def segment_cache_key(job, subtitle, timing_provider):
+    # 세그먼트 결과를 바꾸는 모든 입력: 원본 영상, 자막 문장(또는 덩어리), 실제 자막 타이밍,
+    # 폰트 / 크기 / 색 / 위치 / 효과, 타이밍 제공자, 자막 렌더러와 인코더 설정
+    return make_key(
+        "segment",
+        source_fingerprint(job["video_path"]),
+        subtitle,
+        job["timeline"],
+        job["font_path"],
+        job["font_size"],
+        job["text_color"],
+        job["subtitle_y_position"],
+        job["style"],
+        job.get("box_height"),
+        timing_provider,
+        caption_cache.CAPTION_RENDERER,
+        [SEGMENT_CODEC, SEGMENT_PRESET] + SEGMENT_FFMPEG_PARAMS,
+    )
+
+
+def _cache_temp_path():
+    # 캐시 폴더 안의 임시 경로 (같은 파일시스템이어야 put_file 의 os.replace 가 가능, .tmp 는 정리 대상에서 제외)
+    os.makedirs(segment_cache.directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=segment_cache.directory, suffix=".tmp")
+    os.close(fd)
+    os.remove(temp_path)
+    return temp_path
+
+
+def link_or_copy(source, destination):
+    # 하드 링크 (다른 파일시스템이면 복사)
+    try:
+        os.link(source, destination)
+    except FileNotFoundError:
+        raise
+    except OSError:
+        shutil.copyfile(source, destination)
+
+
+def restore_segment(key, output_path):
+    # 캐시된 세그먼트를 작업 폴더로 연결 (연결해 두면 이어 붙이는 도중 캐시에서 지워져도 안전)
+    cached_path = segment_cache.get_path(key, SEGMENT_CACHE_SUFFIX)
+    if cached_path is None:
+        return False
+    try:
+        link_or_copy(cached_path, output_path)
+    except FileNotFoundError:  # 다른 워커가 방금 삭제한 경우
+        return False
+    return True
+
+
+def store_segment(key, rendered_path):
+    temp_path = _cache_temp_path()
+    try:
+        link_or_copy(rendered_path, temp_path)
+        segment_cache.put_file(key, SEGMENT_CACHE_SUFFIX, temp_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def render_segments(jobs, cache_keys=None):
+    """
+    세그먼트들을 렌더링해서 출력 경로 리스트 반환 (입력 순서대로).
+    cache_keys 가 있으면 캐시에 있는 세그먼트는 다시 인코딩하지 않고, 새로 만든 세그먼트는 캐시에 저장한다.
+    """
+    if not cache_keys or not segment_cache.enabled:
+        return _render_all(jobs)
+
+    missing = [
+        (job, key) for job, key in zip(jobs, cache_keys)
+        if not restore_segment(key, job["output_path"])
+    ]
+    print(f"🎞️ 세그먼트 캐시: {len(jobs) - len(missing)}개 재사용, {len(missing)}개 렌더링")
+
+    _render_all([job for job, _ in missing])
+    for job, key in missing:
+        store_segment(key, job["output_path"])
+    return [job["output_path"] for job in jobs]
+
+
+async def render_segment_async(job, cache_key=None):
+    # 파이프라인용: 캐시에 있으면 재사용, 없으면 세그먼트 워커에서 인코딩한 뒤 캐시에 저장
+    use_cache = cache_key is not None and segment_cache.enabled
+    if use_cache and await asyncio.to_thread(restore_segment, cache_key, job["output_path"]):
+        return job["output_path"]
+
+    if SEGMENT_WORKERS <= 1:
+        await asyncio.to_thread(render_segment, job)
+    else:
+        await asyncio.get_running_loop().run_in_executor(_get_executor(), render_segment, job)
+
+    if use_cache:
+        await asyncio.to_thread(store_segment, cache_key, job["output_path"])
+    return job["output_path"]
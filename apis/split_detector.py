@@ -0,0 +1,79 @@
+# split 자막용 경계 검출기: 음성 인식 없이 PCM 에너지(RMS)만으로 앞부분이 끝나는 시점을 찾는다.
+import re
+import numpy as np
+
+FRAME_MS = 20             # RMS 계산 창 길이
+HOP_MS = 10               # 창 이동 간격
+SILENCE_DB = -35.0        # 최대 RMS 대비 이 값보다 작으면 무음으로 판단
+MIN_PAUSE_MS = 60         # 이보다 짧은 무음은 쉼으로 보지 않음
+STRONG_PAUSE_MS = 150     # 이 길이 이상이면 확실한 쉼
+
+
+def _char_count(text):
+    return len(re.sub(r"[\W_]", "", text))
+
+
+def rms_envelope(pcm, sample_rate, frame_ms=FRAME_MS, hop_ms=HOP_MS):
+    # 짧은 구간 RMS 를 dB(최대값 기준)로 반환
+    frame = max(1, int(sample_rate * frame_ms / 1000))
+    hop = max(1, int(sample_rate * hop_ms / 1000))
+    if len(pcm) < frame:
+        return np.full(1, -np.inf, dtype=np.float32)
+
+    windows = np.lib.stride_tricks.sliding_window_view(pcm, frame)[::hop]
+    rms = np.sqrt(np.mean(np.square(windows, dtype=np.float32), axis=1))
+    peak = rms.max()
+    if peak <= 0:
+        return np.full(len(rms), -np.inf, dtype=np.float32)
+    return 20 * np.log10(np.maximum(rms / peak, 1e-6))
+
+
+def find_pauses(envelope_db, hop_ms=HOP_MS, silence_db=SILENCE_DB, min_pause_ms=MIN_PAUSE_MS):
+    """
+    발화 구간 안쪽의 무음 구간을 찾는다.
+    반환: (발화 시작 프레임, 발화 끝 프레임, [(쉼 시작 프레임, 쉼 끝 프레임), ...])
+    """
+    voiced = envelope_db >= silence_db
+    voiced_idx = np.flatnonzero(voiced)
+    if len(voiced_idx) == 0:
+        return 0, 0, []
+    speech_start, speech_end = voiced_idx[0], voiced_idx[-1] + 1
+
+    # 발화 구간 안에서 무음 ↔ 발화가 바뀌는 지점으로 무음 구간 계산
+    silent = (~voiced[speech_start:speech_end]).astype(np.int8)
+    edges = np.diff(np.concatenate(([0], silent, [0])))
+    starts = np.flatnonzero(edges == 1) + speech_start
+    ends = np.flatnonzero(edges == -1) + speech_start
+
+    min_frames = max(1, int(np.ceil(min_pause_ms / hop_ms)))
+    pauses = [(s, e) for s, e in zip(starts, ends) if e - s >= min_frames]
+    return speech_start, speech_end, pauses
+
+
+def detect_split_point(pcm, sample_rate, front_text, full_text, hop_ms=HOP_MS):
+    """
+    앞부분(front_text)이 끝나는 시간(초)과 신뢰도(0~1)를 반환.
+    발화 구간을 글자 수 비율로 나눈 예상 지점에 가장 가까운 쉼을 고르고,
+    예상 지점과의 거리 / 다른 후보와의 차이 / 쉼 길이로 신뢰도를 계산한다.
+    """
+    envelope = rms_envelope(pcm, sample_rate, hop_ms=hop_ms)
+    speech_start, speech_end, pauses = find_pauses(envelope, hop_ms=hop_ms)
+
+    ratio = _char_count(front_text) / max(1, _char_count(full_text))
+    span = max(1, speech_end - speech_start)
+    expected = speech_start + span * ratio
+    if not pauses:
+        return float(round(expected * hop_ms / 1000, 2)), 0.0
+
+    distances = sorted((abs((s + e) / 2 - expected), s, e) for s, e in pauses)
+    best_distance, best_start, best_end = distances[0]
+
+    proximity = max(0.0, 1 - best_distance / (0.2 * span))
+    distinctness = 1.0
+    if len(distances) > 1:
+        distinctness = max(0.0, 1 - best_distance / max(distances[1][0], 1e-6))
+    strength = min(1.0, (best_end - best_start) * hop_ms / STRONG_PAUSE_MS)
+    confidence = proximity * (0.5 + 0.5 * distinctness) * (0.5 + 0.5 * strength)
+
+    # 쉼이 시작되는 시점 = 앞부분 발화가 끝나는 시점
+    return float(round(best_start * hop_ms / 1000, 2)), float(round(confidence, 2))
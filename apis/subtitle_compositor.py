@@ -0,0 +1,105 @@
+# 세그먼트 영상 위에 자막을 합성하는 가벼운 합성기
+# CompositeVideoClip 은 매 프레임마다 모든 자막 클립을 확인하고 프레임 전체를 블렌딩하지만,
+# 자막은 subtitle_y_position 주변의 가로 띠에만 그려지므로
+#   1) 자막 활성 구간을 미리 색인해 두고 (구간 경계 + 구간별 활성 자막 목록)
+#   2) 활성 자막이 없으면 원본 프레임을 복사 없이 그대로 넘기고
+#   3) 활성 자막이 있으면 프레임을 한 번만 복사해 자막이 닿는 행만 제자리에서 블렌딩한다.
+# 자막 비트맵은 캐시의 uint8 RGBA 를 그대로 공유하고 (읽기 전용), 블렌딩할 때 잘라낸 영역만 float 로 변환한다.
+from bisect import bisect_right
+import numpy as np
+from apis import pop_animation
+
+
+def caption_event(rgba, start, end, y, pop=False):
+    """
+    합성할 자막 하나 (세그먼트 기준 시간, 초).
+    rgba: 자막 비트맵, y: 자막 상단 위치 (가로는 가운데 정렬), pop: 팝업 애니메이션 여부
+    """
+    return {"rgba": rgba, "start": start, "end": end, "y": y, "pop": pop}
+
+
+def _prepare(event):
+    # 이벤트별 레이어 (pop 애니메이션 프레임은 자막이 처음 나타날 때 만든다)
+    return {
+        "start": event["start"],
+        "end": event["end"],
+        "y": int(event["y"]),
+        "pop": event["pop"],
+        "ramp": None,
+        "static": event["rgba"],
+    }
+
+
+def _layer_rgba(layer, t, fps):
+    # 자막 시작 기준 t 초에 그릴 RGBA (pop 이면 처음 0.2초는 애니메이션 프레임)
+    if not layer["pop"]:
+        return layer["static"]
+    if layer["ramp"] is None:
+        layer["ramp"] = pop_animation.pop_rgba_frames(layer["static"], fps)
+    k = pop_animation.frame_index(t, fps)
+    return layer["ramp"][k] if k < len(layer["ramp"]) else layer["static"]
+
+
+def build_interval_index(events):
+    """
+    자막 시작/끝 시각을 경계로 타임라인을 나누고 구간마다 활성 자막 목록을 만든다.
+    반환: (경계 시각 리스트, 구간별 활성 자막 리스트) - 구간 k 는 [경계[k], 경계[k+1])
+    """
+    boundaries = sorted({e["start"] for e in events} | {e["end"] for e in events})
+    active = []
+    for time in boundaries:
+        # moviepy 의 is_playing 과 같은 규칙: start <= t < end
+        active.append([e for e in events if e["start"] <= time < e["end"]])
+    return boundaries, active
+
+
+def active_events(boundaries, active, t):
+    k = bisect_right(boundaries, t) - 1
+    return active[k] if k >= 0 else []
+
+
+def blend_layer(frame, rgba, x, y):
+    # frame 의 자막 영역(행 띠)만 제자리에서 알파 블렌딩 (화면 밖으로 나간 부분은 잘라냄)
+    frame_h, frame_w = frame.shape[:2]
+    h, w = rgba.shape[:2]
+    top, left = max(y, 0), max(x, 0)
+    bottom, right = min(y + h, frame_h), min(x + w, frame_w)
+    if top >= bottom or left >= right:
+        return
+
+    src = rgba[top - y:bottom - y, left - x:right - x]
+    rgb = src[:, :, :3].astype(np.float32)
+    alpha = src[:, :, 3:4].astype(np.float32)
+    alpha *= 1.0 / 255.0
+    region = frame[top:bottom, left:right]
+    band = region.astype(np.float32)
+    band -= rgb
+    band *= 1.0 - alpha
+    band += rgb
+    region[...] = band
+
+
+def composite_captions(clip, events):
+    """
+    clip 위에 자막 이벤트들을 합성한 클립 반환 (길이/오디오/fps 는 clip 그대로).
+    CompositeVideoClip([clip] + 자막 클립들) 과 같은 결과를 만든다.
+    """
+    fps = clip.fps
+    layers = [_prepare(e) for e in events if e["end"] > e["start"]]
+    boundaries, active = build_interval_index(layers)
+
+    def composite_frame(get_frame, t):
+        frame = get_frame(t)
+        playing = active_events(boundaries, active, t)
+        if not playing:
+            return frame
+
+        frame = np.array(frame, dtype=np.uint8)
+        frame_w = frame.shape[1]
+        for layer in playing:
+            rgba = _layer_rgba(layer, t - layer["start"], fps)
+            x = int((frame_w - rgba.shape[1]) / 2)
+            blend_layer(frame, rgba, x, layer["y"])
+        return frame
+
+    return clip.fl(composite_frame, apply_to=[])
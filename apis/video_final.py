@@ -1,18 +1,35 @@
 # 사용자의 입력을 통해 영상 합치기 / 음악, 자막, tts 입히기 작업을 진행해 최종 결과물 영상을 반환
-from fastapi import APIRouter
-from typing import List, Union
+from fastapi import APIRouter, HTTPException
+from typing import List, Union, Optional
 import os
 from pydantic import BaseModel
-from moviepy.editor import CompositeAudioClip, concatenate_videoclips, AudioFileClip, VideoFileClip
 from apis import googleTTS as tts
 from apis import create_subtitle
+from apis import whisper_registry
+from apis import ffmpeg_render
+from apis import media_probe
+from apis import render_pool
+from apis import final_render
+from apis import segment_render
+from apis import render_pipeline
+from apis import preview_proxy
+from apis import segment_normalize
+from apis import rendition_ladder
 from dotenv import load_dotenv
 import asyncio
+import tempfile
 
 router = APIRouter()
 load_dotenv()
 SERVER_HOST = os.getenv("SERVER_HOST")
 
+# 🔹 최종 렌더 엔진: "moviepy" (프레임 단위 합성) / "ffmpeg" (ASS 자막 + ffmpeg 한 번으로 번인)
+#                   / "segments" (세그먼트별 병렬 인코딩 후 재인코딩 없이 이어 붙이기)
+#                   / "pipeline" (segments 와 같지만 TTS 가 끝난 세그먼트부터 바로 인코딩)
+#                   / "auto" (세그먼트 형식이 모두 같으면(수집 단계에서 정규화된 경우) segments, 아니면 moviepy)
+FINAL_RENDER_ENGINE = os.getenv("FINAL_RENDER_ENGINE", "moviepy")
+RENDER_ENGINES = ("moviepy", "ffmpeg", "segments", "pipeline", "auto")
+
 class FinalVideoRequest(BaseModel):
     videos: List[str]
     subtitles: Union[List[str], List[List[str]]]
@@ -21,6 +38,11 @@ class FinalVideoRequest(BaseModel):
     font_effect: str
     font_color: str
     subtitle_y_position: str
+    alignment_model: Optional[str] = None  # 단어 타이밍 분석 Whisper 모델 (예: "base", "base-int8")
+    timing_provider: Optional[str] = None  # 단어 타이밍 제공자 ("whisper" / "ssml_mark")
+    render_engine: Optional[str] = None  # 렌더 엔진 ("moviepy" / "ffmpeg" / "segments" / "pipeline" / "auto")
+    preview: bool = False  # 저해상도 / 저 fps 미리보기 렌더링
+    renditions: bool = False  # 해상도별 MP4 + HLS 출력도 함께 생성
 
 # 최종 비디오 생성 함수
 async def create_final_video(
@@ -30,9 +52,13 @@ async def create_final_video(
     font_path: str,
     font_effect: str,
     font_color: str,
-    subtitle_y_position: str
+    subtitle_y_position: str,
+    alignment_model: Optional[str] = None,
+    timing_provider: Optional[str] = None,
+    render_engine: Optional[str] = None,
+    preview: bool = False,
+    renditions: bool = False
 ):
-    # ✅ 해상도 기준으로 자막 크기 및 위치 계산 (첫 번째 영상 기준)
     filename = video_filenames[0]
     if not filename.endswith(".mp4"):
         filename += ".mp4"
@@ -40,12 +66,55 @@ async def create_final_video(
     if not os.path.exists(video_path):
         raise FileNotFoundError(f"❌ Video file not found: {video_path}")
 
+    # 다운로드 직후 시작된 정규화가 아직 진행 중이면 끝난 뒤의 파일로 렌더링
+    await segment_normalize.wait_for([os.path.join("videos", filename) for filename in video_filenames])
+
+    args = (subtitles, music_url, font_path, font_effect, font_color, subtitle_y_position,
+            alignment_model, timing_provider, render_engine)
+    if not preview:
+        return await render_final_video(video_filenames, *args, renditions=renditions)
+
+    # 🔍 미리보기: 캐시된 저해상도 프록시로 같은 렌더링을 진행 (자막 크기 / 위치 / 박스도 원본 대비 같은 비율로)
+    # TTS 음성과 단어 타이밍은 문장 기준으로 캐시되므로 이후 원본 해상도 렌더링에서 그대로 재사용된다.
+    original_heights = [media_probe.get_media_info(os.path.join("videos", filename))["height"] for filename in video_filenames]
+    os.makedirs(preview_proxy.PREVIEW_WORK_DIR, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=preview_proxy.PREVIEW_WORK_DIR) as work_dir:
+        proxy_paths = await preview_proxy.prepare_proxies(video_filenames, work_dir)
+        return await render_final_video(
+            proxy_paths, *args, output_base="preview_video", original_heights=original_heights)
+
+
+async def render_final_video(
+    video_filenames: List[str],
+    subtitles: List[str],
+    music_url: str,
+    font_path: str,
+    font_effect: str,
+    font_color: str,
+    subtitle_y_position: str,
+    alignment_model: Optional[str] = None,
+    timing_provider: Optional[str] = None,
+    render_engine: Optional[str] = None,
+    output_base: str = "final_video",
+    renditions: bool = False,
+    original_heights: Optional[List[int]] = None
+):
+    # ✅ 해상도 기준으로 자막 크기 및 위치 계산
+    # original_heights: 미리보기처럼 줄인 영상일 때 원본 세그먼트 높이 (자막 박스를 같은 비율로 줄임)
     subtitle_y_positions = []
     font_sizes = []
-    for filename in video_filenames:
+    segments = []
+    for idx, filename in enumerate(video_filenames):
         video_path = os.path.join("videos", filename)
-        clip = VideoFileClip(video_path)
-        h = clip.h
+        # 영상을 열지 않고 캐시된 메타데이터로 레이아웃 계산
+        info = media_probe.get_media_info(video_path)
+        h = info["height"]
+        scale = h / original_heights[idx] if original_heights else 1.0
+        segments.append({
+            "width": info["width"], "height": h, "duration": info["duration"], "fps": info["fps"],
+            "normalized": segment_normalize.is_normalized(info),
+            "box_height": create_subtitle.caption_box_height(font_effect, scale),
+        })
         f_size = int(h*0.03)
         if subtitle_y_position == "center":
             y_ratio = 0.425
@@ -56,67 +125,140 @@ async def create_final_video(
         y_pos = int(h * y_ratio - f_size * 0.5)
         font_sizes.append(f_size)          # 해상도 기반 폰트 크기
         subtitle_y_positions.append(y_pos)
-        clip.close()
-    
-    video_clips = []
+
+    music_path = os.path.join("music", music_url)
+    engine = render_engine or FINAL_RENDER_ENGINE
+    if engine == "auto":
+        engine = "segments" if segment_render.can_stream_copy(segments) else "moviepy"
+        normalized = sum(1 for segment in segments if segment["normalized"])
+        print(f"🎬 렌더 엔진 자동 선택: {engine} (정규화된 세그먼트 {normalized}/{len(segments)}개)")
+    if engine == "pipeline" and not segment_render.can_stream_copy(segments):
+        print("⚠️ 세그먼트 크기/fps 가 서로 달라 moviepy 로 한 번에 렌더링합니다.")
+        engine = "moviepy"
+
+    if engine == "pipeline":
+        # ✅ TTS / 단어 타이밍 / 세그먼트 인코딩을 세그먼트 단위로 겹쳐서 진행
+        output_filename = next_output_filename(output_base)
+        output_path = os.path.join("videos", output_filename)
+        try:
+            await render_pool.run_async(
+                render_pipeline.render_pipelined,
+                video_filenames, subtitles, segments, font_path, font_sizes, font_effect,
+                font_color, subtitle_y_positions, music_path, output_path,
+                alignment_model=alignment_model, timing_provider=timing_provider, renditions=renditions)
+        except render_pool.RenderTimeout:
+            raise
+        except BaseException:
+            remove_if_empty(output_path)
+            raise
+        return output_filename
+
     if font_effect == "poping":
-        tts_audio_path, durations = await tts.text_to_speech_with_poping(subtitles)
-        video_clips = create_subtitle.create_video_with_word_subtitles(
-            video_filenames, subtitles, durations, font_path, font_sizes, font_color, subtitle_y_positions)
+        tts_track, timing_data = await tts.text_to_speech_with_poping(
+            subtitles, model_name=alignment_model, provider=timing_provider)
     elif font_effect == "split":
-        tts_audio_path, durations = await tts.text_to_speech(subtitles)
-        video_clips = create_subtitle.create_video_with_split_subtitles(
-            video_filenames, subtitles, durations, font_path, font_sizes, font_color, subtitle_y_positions)
+        tts_track, timing_data = await tts.text_to_speech(subtitles, model_name=alignment_model, provider=timing_provider)
     elif font_effect == "custom_poping":
-        tts_audio_path, word_timings_list = await tts.text_to_speech_with_poping([" ".join(chunks) for chunks in subtitles])
-        video_clips = create_subtitle.create_video_with_custom_chunks(
-            video_filenames, subtitles, word_timings_list, font_path, font_sizes, font_color, subtitle_y_positions)
+        tts_track, timing_data = await tts.text_to_speech_with_poping(
+            [" ".join(chunks) for chunks in subtitles], model_name=alignment_model, provider=timing_provider)
 
-    # ✅ 모든 비디오 클립 이어 붙이기
-    final_video = concatenate_videoclips(video_clips, method="compose")
+    output_filename = next_output_filename(output_base)
+    output_path = os.path.join("videos", output_filename)
 
-    # ✅ 배경음악 로드
-    music_path = os.path.join("music", music_url)
-    bgm_audio = AudioFileClip(music_path).volumex(0.2)
+    if engine == "ffmpeg" and not ffmpeg_render.burn_in_available():
+        print("⚠️ ffmpeg 에 subtitles(libass) 필터가 없어 moviepy 로 렌더링합니다.")
+        engine = "moviepy"
 
-    # ✅ TTS 로드
-    tts_audio = AudioFileClip(tts_audio_path)
+    # ✅ 동기 렌더링(자막 합성 + 인코딩)은 렌더 워커 풀에서 실행해 이벤트 루프를 막지 않음
+    try:
+        if engine == "segments":
+            await render_pool.run(
+                final_render.render_with_segments,
+                video_filenames, subtitles, timing_data, tts_track, segments, font_path, font_sizes,
+                font_effect, font_color, subtitle_y_positions, music_path, output_path,
+                timing_provider=timing_provider or tts.TIMING_PROVIDER, renditions=renditions)
+        elif engine == "ffmpeg":
+            await render_pool.run(
+                final_render.render_with_ffmpeg,
+                video_filenames, subtitles, timing_data, tts_track, segments, font_path, font_sizes,
+                font_effect, font_color, subtitle_y_positions, music_path, output_path, renditions=renditions)
+        else:
+            await render_pool.run(
+                final_render.render_with_moviepy,
+                video_filenames, subtitles, timing_data, tts_track, font_path, font_sizes,
+                font_effect, font_color, subtitle_y_positions, music_path, output_path, renditions=renditions,
+                box_heights=[segment["box_height"] for segment in segments])
+    except render_pool.RenderTimeout:
+        raise
+    except BaseException:
+        remove_if_empty(output_path)
+        raise
+
+    return output_filename
 
-    # ✅ 두 오디오를 합침
-    combined_audio = CompositeAudioClip([bgm_audio, tts_audio]).set_duration(final_video.duration)
 
-    # ✅ 임시 TTS 파일 삭제
-    if os.path.exists(tts_audio_path):
-        os.remove(tts_audio_path)
+def remove_if_empty(output_path):
+    # 실패한 렌더링이 남긴 빈 출력 파일 정리
+    if os.path.exists(output_path) and os.path.getsize(output_path) == 0:
+        os.remove(output_path)
 
-    # ✅ 최종 오디오 삽입
-    final_video_with_bgm = final_video.set_audio(combined_audio)
 
+def next_output_filename(base_filename="final_video"):
     # ✅ 최종 비디오 저장 (videos 폴더에 저장)
-    base_filename = "final_video"
+    # 여러 렌더링이 동시에 진행되므로 빈 파일을 배타적으로 만들어 이름을 선점
     ext = ".mp4"
     i = 1
-    while os.path.exists(os.path.join("videos", f"{base_filename}_{i}{ext}")):
-        i += 1
-    output_filename = f"{base_filename}_{i}{ext}"
-    output_path = os.path.join("videos", output_filename)
+    while True:
+        filename = f"{base_filename}_{i}{ext}"
+        try:
+            os.close(os.open(os.path.join("videos", filename), os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return filename
+        except FileExistsError:
+            i += 1
 
-    final_video_with_bgm.write_videofile(output_path, codec="libx264", audio_codec="aac", preset="ultrafast")
-
-    return output_filename
 
 # FastAPI 엔드포인트
 @router.post("/")
 async def generate_final_video(request: FinalVideoRequest):
-    final_video = await create_final_video(
-        request.videos,
-        request.subtitles,
-        request.music_url,
-        request.font_path,
-        request.font_effect,
-        request.font_color,
-        request.subtitle_y_position
-    )
+    if request.alignment_model and not whisper_registry.is_valid_model_name(request.alignment_model):
+        raise HTTPException(status_code=400, detail=f"Unknown alignment model: {request.alignment_model}")
+    if request.timing_provider and request.timing_provider not in tts.TIMING_PROVIDERS:
+        raise HTTPException(status_code=400, detail=f"Unknown timing provider: {request.timing_provider}")
+    if request.render_engine and request.render_engine not in RENDER_ENGINES:
+        raise HTTPException(status_code=400, detail=f"Unknown render engine: {request.render_engine}")
+
+    try:
+        # 렌더링 대기열 자리를 TTS 를 시작하기 전에 잡고 (가득 찼으면 바로 거절), 렌더링이 끝나면 반납
+        with render_pool.reserve():
+            final_video = await create_final_video(
+                request.videos,
+                request.subtitles,
+                request.music_url,
+                request.font_path,
+                request.font_effect,
+                request.font_color,
+                request.subtitle_y_position,
+                request.alignment_model,
+                request.timing_provider,
+                request.render_engine,
+                request.preview,
+                request.renditions
+            )
+    except render_pool.RenderQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except render_pool.RenderTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
 
     final_video_path = f"http://{SERVER_HOST}/videos/{final_video}"
-    return {"final_video_url": final_video_path}
+    response = {"final_video_url": final_video_path}
+    published = rendition_ladder.published_renditions(final_video) if request.renditions else None
+    if published is not None:
+        response["hls_master_url"] = f"http://{SERVER_HOST}/videos/{published['master']}"
+        response["renditions"] = {
+            name: {
+                "mp4_url": f"http://{SERVER_HOST}/videos/{paths['mp4']}",
+                "hls_url": f"http://{SERVER_HOST}/videos/{paths['hls']}",
+            }
+            for name, paths in published["renditions"].items()
+        }
+    return response
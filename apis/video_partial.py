@@ -9,6 +9,8 @@ from runwayml import RunwayML  # ✅ Runway API 클라이언트 사용
 from pydantic import BaseModel
 import shutil
 import asyncio
+from apis import media_probe
+from apis import segment_normalize
 
 router = APIRouter()
 
@@ -211,6 +213,10 @@ async def download_video(video_url: str, save_path: str):
             for chunk in response.iter_content(chunk_size=1024):
                 video_file.write(chunk)
         print(f"✅ Video saved: {save_path}")
+        # 최종 렌더링 때 다시 열지 않도록 영상 정보(크기, fps, 길이, 코덱)를 미리 캐시
+        await asyncio.to_thread(media_probe.prime, save_path)
+        # 최종 렌더링에서 재인코딩 없이 이어 붙일 수 있도록 표준 형식으로 정규화 (백그라운드)
+        segment_normalize.schedule(save_path)
     else:
         print(f"❌ Failed to download video: {video_url}")
 
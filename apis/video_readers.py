@@ -0,0 +1,232 @@
+# ffmpeg 리더(VideoFileClip) 관리
+# 클립을 열 때마다 ffmpeg 하위 프로세스와 파일 디스크립터가 생기는데, 닫지 않으면 워커에 계속 쌓인다.
+#   - 프로세스당 동시에 열 수 있는 리더 수를 제한하고 (렌더링 하나가 필요한 만큼 한 번에 예약)
+#   - render_session() 안에서 연 리더는 렌더링이 끝나거나 실패하면 모두 닫으며
+#   - 열려 있는 리더 수 / ffmpeg 프로세스 메모리를 조회할 수 있게 한다.
+#     렌더링은 워커 프로세스에서 진행되므로 워커들이 주기적으로 파일에 남긴 상태를 API 프로세스에서 모아 본다.
+import os
+import json
+import time
+import atexit
+import tempfile
+import threading
+import contextvars
+from contextlib import contextmanager
+from moviepy.editor import VideoFileClip
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# 🔹 프로세스당 동시에 열 수 있는 미디어 파일 수 / 자리가 날 때까지 기다리는 최대 시간 (초)
+VIDEO_READER_LIMIT = int(os.getenv("VIDEO_READER_LIMIT", "16"))
+VIDEO_READER_TIMEOUT = float(os.getenv("VIDEO_READER_TIMEOUT", "300"))
+# 🔹 워커 프로세스가 리더 상태를 기록하는 폴더 / 주기 (초)
+READER_STATS_DIR = os.getenv("READER_STATS_DIR", os.path.join("cache", "reader_stats"))
+READER_STATS_INTERVAL = float(os.getenv("READER_STATS_INTERVAL", "2"))
+
+_condition = threading.Condition()
+_in_use = 0       # 예약 + 열려 있는 리더 수
+_waiting = 0
+_open_readers = {}  # id(clip) -> {"path", "clip", "opened_at"}
+_current_session = contextvars.ContextVar("video_reader_session", default=None)
+
+
+def _acquire(count):
+    # 자리가 count 개 날 때까지 대기 (제한보다 많이 필요하면 아무것도 열려 있지 않을 때 진행)
+    global _in_use, _waiting
+    with _condition:
+        _waiting += 1
+        try:
+            ok = _condition.wait_for(
+                lambda: _in_use + count <= VIDEO_READER_LIMIT or _in_use == 0,
+                timeout=VIDEO_READER_TIMEOUT
+            )
+        finally:
+            _waiting -= 1
+        if not ok:
+            raise TimeoutError(f"영상 리더 대기 시간 초과 (열린 리더 {_in_use}/{VIDEO_READER_LIMIT})")
+        _in_use += count
+
+
+def _release(count):
+    global _in_use
+    if count <= 0:
+        return
+    with _condition:
+        _in_use -= count
+        _condition.notify_all()
+
+
+class _Session:
+    def __init__(self, reserved):
+        self.reserved = reserved
+        self.clips = []
+
+
+@contextmanager
+def render_session(readers=0):
+    """
+    렌더링 하나에서 쓰는 리더의 수명 범위.
+    readers 만큼 자리를 미리 예약해 두고, 블록이 끝나면(예외 포함) 이 안에서 연 리더를 모두 닫는다.
+    """
+    if readers:
+        _acquire(readers)
+    session = _Session(readers)
+    token = _current_session.set(session)
+    try:
+        yield session
+    finally:
+        _current_session.reset(token)
+        for clip in reversed(session.clips):
+            _close(clip)
+        _release(session.reserved)
+
+
+def _open(factory, path):
+    session = _current_session.get()
+    if session is not None and session.reserved > 0:
+        session.reserved -= 1
+    else:
+        _acquire(1)
+
+    try:
+        clip = factory(path)
+    except BaseException:
+        _release(1)
+        raise
+
+    with _condition:
+        _open_readers[id(clip)] = {"path": path, "clip": clip, "opened_at": time.time()}
+    if session is not None:
+        session.clips.append(clip)
+    return clip
+
+
+def open_video(path):
+    # VideoFileClip 열기 (render_session 안이면 세션이 끝날 때 자동으로 닫힘)
+    return _open(VideoFileClip, path)
+
+
+def _close(clip):
+    with _condition:
+        entry = _open_readers.pop(id(clip), None)
+    if entry is None:
+        return
+    try:
+        clip.close()
+    except Exception as e:
+        print(f"⚠️ 리더 닫기 실패 ({entry['path']}): {e}")
+    finally:
+        _release(1)
+
+
+def close(clip):
+    # 세션 밖에서 연 리더를 직접 닫을 때 사용 (세션 안의 리더는 세션이 닫음)
+    _close(clip)
+
+
+def _reader_processes(clip):
+    # 클립이 띄운 ffmpeg 하위 프로세스들 (영상 리더 + 오디오 리더)
+    readers = [getattr(clip, "reader", None), getattr(getattr(clip, "audio", None), "reader", None)]
+    return [reader.proc for reader in readers if getattr(reader, "proc", None) is not None]
+
+
+def _process_rss_bytes(pid):
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def reader_stats():
+    # 열린 리더 수와 ffmpeg 리더 프로세스들의 상주 메모리(RSS)
+    with _condition:
+        entries = list(_open_readers.values())
+        in_use, waiting = _in_use, _waiting
+
+    now = time.time()
+    readers = []
+    for entry in entries:
+        processes = _reader_processes(entry["clip"])
+        readers.append({
+            "path": entry["path"],
+            "open_seconds": round(now - entry["opened_at"], 1),
+            "processes": len(processes),
+            "rss_bytes": sum(_process_rss_bytes(proc.pid) for proc in processes),
+        })
+
+    return {
+        "limit": VIDEO_READER_LIMIT,
+        "open": len(readers),
+        "reserved": in_use - len(readers),
+        "waiting": waiting,
+        "rss_bytes": sum(r["rss_bytes"] for r in readers),
+        "readers": readers,
+    }
+
+
+def _stats_path(pid):
+    return os.path.join(READER_STATS_DIR, f"{pid}.json")
+
+
+def _publish_stats():
+    # 이 프로세스의 리더 상태를 원자적으로 기록 (API 프로세스가 읽음)
+    os.makedirs(READER_STATS_DIR, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=READER_STATS_DIR, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(dict(reader_stats(), pid=os.getpid()), f)
+    os.replace(temp_path, _stats_path(os.getpid()))
+
+
+def _publish_loop():
+    while True:
+        try:
+            _publish_stats()
+        except OSError as e:
+            print(f"⚠️ 리더 상태 기록 실패: {e}")
+        time.sleep(READER_STATS_INTERVAL)
+
+
+def _remove_stats_file(pid):
+    try:
+        os.remove(_stats_path(pid))
+    except OSError:
+        pass
+
+
+def start_stats_publisher():
+    # 렌더 / 세그먼트 워커 프로세스 initializer: 리더 상태를 주기적으로 기록
+    threading.Thread(target=_publish_loop, name="video-reader-stats", daemon=True).start()
+    atexit.register(_remove_stats_file, os.getpid())
+
+
+def all_reader_stats():
+    """
+    API 프로세스 + 워커 프로세스들의 리더 상태.
+    최근 READER_STATS_INTERVAL 의 3배 안에 기록된 워커 상태만 사용 (종료된 워커 제외).
+    """
+    processes = [dict(reader_stats(), pid=os.getpid())]
+    now = time.time()
+    try:
+        filenames = os.listdir(READER_STATS_DIR)
+    except FileNotFoundError:
+        filenames = []
+    for filename in filenames:
+        if not filename.endswith(".json") or filename == f"{os.getpid()}.json":
+            continue
+        path = os.path.join(READER_STATS_DIR, filename)
+        try:
+            if now - os.path.getmtime(path) > READER_STATS_INTERVAL * 3:
+                continue
+            with open(path, encoding="utf-8") as f:
+                processes.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+
+    return {
+        "open": sum(p["open"] for p in processes),
+        "waiting": sum(p["waiting"] for p in processes),
+        "rss_bytes": sum(p["rss_bytes"] for p in processes),
+        "processes": processes,
+    }
@@ -0,0 +1,171 @@
+# Whisper 모델을 워커 프로세스당 한 번만 로드해서 공유하는 레지스트리
+import os
+import time
+import threading
+import torch
+import whisper
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# 🔹 기본 Whisper 모델 (tiny, base, small, medium, large)
+# 이름 뒤에 "-int8" 을 붙이면 (예: "base-int8") CPU 용 int8 동적 양자화 모델을 사용한다.
+WHISPER_MODEL_SIZE = os.getenv("WHISPER_MODEL_SIZE", "base")
+QUANTIZED_SUFFIX = "-int8"
+
+# 🔹 서버 시작 시 미리 로드할 모델 목록 (쉼표 구분, 예: "base,small")
+WHISPER_PRELOAD_MODELS = [
+    name.strip() for name in os.getenv("WHISPER_PRELOAD_MODELS", "").split(",") if name.strip()
+]
+
+_models = {}        # 모델 이름 -> 로드된 모델
+_model_stats = {}   # 모델 이름 -> 로드 시간 / 메모리 정보
+_load_locks = {}    # 모델 이름 -> 로드 전용 락 (같은 모델을 두 번 로드하지 않도록)
+_infer_locks = {}   # 모델 이름 -> 추론 전용 락
+_registry_lock = threading.Lock()
+
+
+def _get_rss_bytes():
+    # 현재 프로세스의 상주 메모리(RSS)를 바이트 단위로 반환
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        # /proc 이 없는 환경(macOS 등)에서는 최대 RSS로 대체
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _locks_for(name):
+    with _registry_lock:
+        if name not in _load_locks:
+            _load_locks[name] = threading.Lock()
+            _infer_locks[name] = threading.Lock()
+        return _load_locks[name], _infer_locks[name]
+
+
+def parse_model_name(name):
+    # "base-int8" → ("base", True), "small" → ("small", False)
+    if name.endswith(QUANTIZED_SUFFIX):
+        return name[:-len(QUANTIZED_SUFFIX)], True
+    return name, False
+
+
+def is_valid_model_name(name):
+    size, _ = parse_model_name(name)
+    return size in whisper.available_models()
+
+
+def _quantize(model):
+    """
+    Linear 레이어를 int8 동적 양자화 (CPU 전용).
+    Whisper 의 Linear 는 dtype 변환만 하는 nn.Linear 하위 클래스라서
+    quantize_dynamic 이 인식하도록 nn.Linear 로 바꾼 뒤 양자화한다.
+    """
+    for module in model.modules():
+        if isinstance(module, torch.nn.Linear):
+            module.__class__ = torch.nn.Linear
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _model_bytes(model):
+    # 일반 파라미터 + 양자화된 Linear 가중치 크기
+    total = sum(p.numel() * p.element_size() for p in model.parameters())
+    for module in model.modules():
+        weight = getattr(module, "weight", None)
+        if callable(weight):  # 양자화 Linear 는 weight() 메서드로 가중치를 반환
+            total += weight().numel() * weight().element_size()
+    return total
+
+
+def _load(name):
+    size, quantized = parse_model_name(name)
+    if size not in whisper.available_models():
+        raise ValueError(f"지원하지 않는 Whisper 모델입니다: {name}")
+
+    rss_before = _get_rss_bytes()
+    load_start = time.perf_counter()
+    if quantized:
+        model = _quantize(whisper.load_model(size, device="cpu"))
+    else:
+        model = whisper.load_model(size)
+    load_seconds = time.perf_counter() - load_start
+
+    param_bytes = _model_bytes(model)
+    _model_stats[name] = {
+        "load_seconds": round(load_seconds, 2),
+        "param_bytes": param_bytes,
+        "rss_delta_bytes": max(0, _get_rss_bytes() - rss_before),
+        "quantized": quantized,
+        "loaded_at": time.time(),
+    }
+    print(f"🧠 Whisper 모델 로드 완료: {name} | {load_seconds:.2f}s | "
+          f"파라미터 {param_bytes / 1024 / 1024:.1f}MB | RSS {_get_rss_bytes() / 1024 / 1024:.1f}MB")
+    return model
+
+
+def get_model(name=None):
+    """
+    이름에 해당하는 Whisper 모델을 반환. 아직 로드되지 않았다면 한 번만 로드한다.
+    여러 스레드가 동시에 요청해도 로드는 한 번만 일어난다.
+    """
+    name = name or WHISPER_MODEL_SIZE
+    model = _models.get(name)
+    if model is not None:
+        return model
+
+    load_lock, _ = _locks_for(name)
+    with load_lock:
+        model = _models.get(name)
+        if model is None:
+            model = _load(name)
+            _models[name] = model
+    return model
+
+
+def transcribe(audio, name=None, **kwargs):
+    """
+    공유 모델로 transcribe 를 수행.
+    word_timestamps 옵션은 모델의 cross-attention 에 hook 을 걸었다가 제거하므로
+    같은 모델 인스턴스에서 동시에 실행되면 결과가 섞인다 → 모델별 락으로 직렬화.
+    """
+    name = name or WHISPER_MODEL_SIZE
+    model = get_model(name)
+    _, infer_lock = _locks_for(name)
+    with infer_lock:
+        return model.transcribe(audio, **kwargs)
+
+
+def preload_models(names=None):
+    # 서버 시작 시 설정된 모델들을 미리 로드
+    for name in names if names is not None else WHISPER_PRELOAD_MODELS:
+        get_model(name)
+
+
+def evict_model(name=None):
+    # 모델을 레지스트리에서 제거 (진행 중인 추론이 끝난 뒤 해제)
+    name = name or WHISPER_MODEL_SIZE
+    load_lock, infer_lock = _locks_for(name)
+    with load_lock, infer_lock:
+        removed = _models.pop(name, None) is not None
+        _model_stats.pop(name, None)
+    if removed:
+        print(f"🗑️ Whisper 모델 해제: {name}")
+    return removed
+
+
+def reload_model(name=None):
+    # 모델을 해제한 뒤 다시 로드
+    name = name or WHISPER_MODEL_SIZE
+    evict_model(name)
+    return get_model(name)
+
+
+def model_stats():
+    # 로드된 모델별 로드 시간과 메모리 사용량, 현재 프로세스 RSS 반환
+    return {
+        "pid": os.getpid(),
+        "models": {name: dict(stats) for name, stats in _model_stats.items()},
+        "rss_bytes": _get_rss_bytes(),
+    }
@@ -0,0 +1,48 @@
+# ImageMagick(TextClip) 자막 렌더링과 Pillow 렌더링의 속도 / 결과 차이 비교
+# 실행: python -m benchmarks.caption_renderer <폰트 이름 또는 경로> [반복 횟수]
+import sys
+import time
+import numpy as np
+from apis import caption_cache
+
+SAMPLE_CAPTIONS = [
+    "코드를 작성할 때", "주석을 충분히", "달지 않는 실수를", "종종 합니다.",
+    "변수명을 명확하지 않게", "지어서 나중에", "혼란을 겪게 되죠.",
+    "구독과 좋아요 부탁드려요!", "에러 메시지를 제대로", "읽지 않고 넘어가는 경우도 흔해요.",
+]
+
+
+def measure(renderer, font, repeat, fontsize=40, size=(768, 200)):
+    images = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        images = [
+            caption_cache.rasterize_caption(text, fontsize, "white", font, size, renderer=renderer)
+            for text in SAMPLE_CAPTIONS
+        ]
+    elapsed = time.perf_counter() - start
+    return elapsed / (repeat * len(SAMPLE_CAPTIONS)), images
+
+
+def alpha_bbox(rgba):
+    # 글자가 그려진 영역 (위, 아래, 왼쪽, 오른쪽)
+    rows = np.flatnonzero(rgba[:, :, 3].max(axis=1))
+    cols = np.flatnonzero(rgba[:, :, 3].max(axis=0))
+    if len(rows) == 0:
+        return None
+    return rows[0], rows[-1], cols[0], cols[-1]
+
+
+def main(font, repeat):
+    magick_seconds, magick_images = measure("imagemagick", font, repeat)
+    pillow_seconds, pillow_images = measure("pillow", font, repeat)
+
+    print(f"ImageMagick: 자막당 {magick_seconds * 1000:.1f}ms")
+    print(f"Pillow:      자막당 {pillow_seconds * 1000:.2f}ms (x{magick_seconds / pillow_seconds:.0f})")
+    for text, magick, pillow in zip(SAMPLE_CAPTIONS, magick_images, pillow_images):
+        alpha_diff = np.abs(magick[:, :, 3].astype(np.int16) - pillow[:, :, 3]).mean()
+        print(f"  {text} | 알파 평균 차이 {alpha_diff:.1f} | 영역 {alpha_bbox(magick)} vs {alpha_bbox(pillow)}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 5)
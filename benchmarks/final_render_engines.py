@@ -0,0 +1,76 @@
+# 최종 렌더 엔진(moviepy 합성 / 세그먼트 병렬 인코딩 / ASS + ffmpeg 번인) 처리 속도 비교
+# TTS / Whisper 없이 고정된 자막 타이밍과 무음 TTS 트랙으로 렌더링 단계만 측정한다.
+# 실행: python -m benchmarks.final_render_engines <music 파일> <폰트> <videos 폴더의 영상 파일들...>
+import os
+import sys
+import time
+import numpy as np
+from apis import final_render
+from apis import ffmpeg_render
+from apis import media_probe
+from apis import googleTTS as tts
+
+SAMPLE_SUBTITLES = [
+    "코드를 작성할 때 주석을 충분히 달지 않는 실수를 종종 합니다.",
+    "변수명을 명확하지 않게 지어서 나중에 혼란을 겪게 되죠.",
+    "에러 메시지를 제대로 읽지 않고 넘어가는 경우도 흔해요.",
+    "구독과 좋아요 부탁드려요!",
+]
+
+
+def sample_word_timings(subtitle, idx, interval=5):
+    # 문장 단어를 5초 슬롯 앞쪽 4초에 고르게 배치한 가짜 단어 타이밍
+    words = subtitle.split()
+    step = 4.0 / len(words)
+    start = idx * interval + 0.5
+    return [
+        {"word": word, "start": round(start + i * step, 2), "end": round(start + (i + 1) * step, 2)}
+        for i, word in enumerate(words)
+    ]
+
+
+def layout(video_filenames):
+    segments, font_sizes, y_positions = [], [], []
+    for filename in video_filenames:
+        info = media_probe.get_media_info(os.path.join("videos", filename))
+        segments.append({"width": info["width"], "height": info["height"], "duration": info["duration"], "fps": info["fps"]})
+        font_sizes.append(int(info["height"] * 0.03))
+        y_positions.append(int(info["height"] * 0.75 - info["height"] * 0.03 * 0.5))
+    return segments, font_sizes, y_positions
+
+
+def main(music_url, font, video_filenames):
+    segments, font_sizes, y_positions = layout(video_filenames)
+    subtitles = [SAMPLE_SUBTITLES[i % len(SAMPLE_SUBTITLES)] for i in range(len(video_filenames))]
+    timing_data = [sample_word_timings(text, i) for i, text in enumerate(subtitles)]
+    duration = sum(s["duration"] for s in segments)
+    tts_track = np.zeros(int(duration * tts.TRACK_SAMPLE_RATE), dtype=np.float32)
+    music_path = os.path.join("music", music_url)
+
+    engines = {
+        "moviepy": final_render.render_with_moviepy,
+        "segments": lambda *args: final_render.render_with_segments(*args[:4], segments, *args[4:]),
+    }
+    if ffmpeg_render.burn_in_available():
+        engines["ffmpeg"] = lambda *args: final_render.render_with_ffmpeg(*args[:4], segments, *args[4:])
+    else:
+        print("⚠️ subtitles(libass) 필터가 없는 ffmpeg 이라 ffmpeg 엔진은 건너뜁니다.")
+
+    results = {}
+    for name, render in engines.items():
+        output_path = os.path.join("videos", f"benchmark_{name}.mp4")
+        start = time.perf_counter()
+        render(video_filenames, subtitles, timing_data, tts_track, font, font_sizes,
+               "poping", "white", y_positions, music_path, output_path)
+        results[name] = time.perf_counter() - start
+
+    print(f"\n영상 길이 {duration:.1f}초, 세그먼트 {len(video_filenames)}개")
+    for name, elapsed in results.items():
+        print(f"{name:9s}: {elapsed:.1f}초 (실시간 대비 x{duration / elapsed:.2f})")
+    for name, elapsed in results.items():
+        if name != "moviepy":
+            print(f"{name} 엔진 속도 향상: x{results['moviepy'] / elapsed:.1f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1], sys.argv[2], sys.argv[3:])
@@ -0,0 +1,112 @@
+# SSML mark 타이밍 제공자를 Google TTS 대신 로컬 가짜 서버(stand-in)로 확인
+# 실행: python -m benchmarks.ssml_mark_stand_in  (API 키 / 네트워크 필요 없음, ffmpeg 필요)
+# 가짜 서버는 v1beta1 text:synthesize 요청의 <mark> 마다 타임포인트를 돌려주며,
+# 실제 API 처럼 0초 mark 는 timeSeconds 를 생략한다 (proto3 JSON).
+import os
+import re
+import sys
+import json
+import base64
+import asyncio
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SECONDS_PER_WORD = 0.4
+SAMPLE_SENTENCES = [
+    "코드를 작성할 때 주석을 충분히 달지 않는 실수를 종종 합니다.",
+    "동해물과 백두산이 마르고 닳도록.",
+]
+
+
+def silent_mp3(seconds):
+    # 요청 길이만큼의 무음 mp3 (decode_tts_audio 가 실제로 디코딩할 수 있는 오디오)
+    from apis import ffmpeg_utils
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = os.path.join(work_dir, "silence.mp3")
+        ffmpeg_utils.run_ffmpeg([
+            "-f", "lavfi", "-i", "anullsrc=r=24000:cl=mono", "-t", f"{seconds:.2f}", "-c:a", "libmp3lame", path
+        ])
+        with open(path, "rb") as f:
+            return f.read()
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        text = body["input"].get("ssml") or body["input"].get("text", "")
+        marks = re.findall(r'<mark name="([^"]+)"/>', text)
+        timepoints = []
+        for idx, name in enumerate(marks):
+            point = {"markName": name}
+            if idx > 0:  # 0초는 proto3 JSON 에서 생략됨
+                point["timeSeconds"] = round(idx * SECONDS_PER_WORD, 3)
+            timepoints.append(point)
+
+        duration = max(1, len(marks)) * SECONDS_PER_WORD
+        response = {"audioContent": base64.b64encode(silent_mp3(duration)).decode("ascii")}
+        if "enableTimePointing" in body:
+            response["timepoints"] = timepoints
+
+        payload = json.dumps(response).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stand_in():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def check(tts):
+    failures = 0
+    for sentence in SAMPLE_SENTENCES:
+        words = sentence.split()
+        # 캐시에 남은 결과가 아니라 가짜 서버 응답으로 확인
+        tts_data, word_timings = await tts.generate_tts_with_marks(sentence)
+        if tts_data is None or word_timings is None:
+            print(f"❌ 타임포인트 없음 (Whisper 로 대체됨): {sentence}")
+            failures += 1
+            continue
+
+        expected = [round(idx * SECONDS_PER_WORD, 2) for idx in range(len(words))]
+        starts = [timing["start"] for timing in word_timings]
+        if [timing["word"] for timing in word_timings] != words or starts != expected:
+            print(f"❌ 타이밍 불일치: {starts} != {expected}")
+            failures += 1
+            continue
+
+        pcm, provider_timings = await tts.ssml_mark_timing_provider(sentence)
+        if provider_timings != word_timings or len(pcm) == 0:
+            print(f"❌ ssml_mark_timing_provider 결과 불일치: {sentence}")
+            failures += 1
+            continue
+        print(f"✅ {len(words)}단어, 첫 단어 {starts[0]}초 시작: {sentence}")
+    await tts.close_http_client()
+    return failures
+
+
+def main():
+    server = start_stand_in()
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # googleTTS 는 import 시점에 설정을 읽으므로 먼저 지정
+        os.environ["GOOGLE_TTS_ENDPOINT"] = f"http://127.0.0.1:{server.server_port}"
+        os.environ["GOOGLE_TTS_API_KEY"] = "stand-in"
+        os.environ["TTS_CACHE_DIR"] = cache_dir
+        from apis import googleTTS as tts
+
+        failures = asyncio.run(check(tts))
+    server.shutdown()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# 문장별 Whisper 분석과 전체 트랙 1회 분석의 속도 / 타이밍 차이 비교
+# 실행: python -m benchmarks.whisper_alignment  (GOOGLE_TTS_API_KEY 필요)
+import asyncio
+import sys
+import time
+from apis import googleTTS as tts
+from apis import audio_track
+
+SAMPLE_SENTENCES = [
+    "코드를 작성할 때 주석을 충분히 달지 않는 실수를 종종 합니다.",
+    "변수명을 명확하지 않게 지어서 나중에 혼란을 겪게 되죠.",
+    "백업 없이 중요한 코드를 수정하는 경우가 많습니다.",
+    "에러 메시지를 제대로 읽지 않고 넘어가는 경우도 흔해요.",
+    "동해물과 백두산이 마르고 닳도록.",
+    "하느님이 보우하사 우리나라 만세.",
+    "무궁화 삼천리 화려강산",
+    "대한사람 대한으로 길이 보전하세",
+]
+
+
+async def synthesize(sentences):
+    tts_data_list = await tts.generate_tts_many(sentences)
+    await tts.close_http_client()
+    return [tts.decode_tts_audio(data) for data in tts_data_list]
+
+
+def run_sentence_mode(clips, interval=5000):
+    return [
+        tts.adjust_word_timings(
+            tts.analyze_audio_words_with_whisper(tts.to_whisper_input(clip)),
+            idx * interval
+        )
+        for idx, clip in enumerate(clips)
+    ]
+
+
+def boundary_error(reference, candidate):
+    # 같은 순서의 단어끼리 시작/끝 시간 차이의 평균 (초)
+    diffs = []
+    for ref_words, cand_words in zip(reference, candidate):
+        for ref, cand in zip(ref_words, cand_words):
+            diffs.append(abs(ref["start"] - cand["start"]))
+            diffs.append(abs(ref["end"] - cand["end"]))
+    return sum(diffs) / len(diffs) if diffs else 0.0
+
+
+def main(sentences):
+    clips = asyncio.run(synthesize(sentences))
+    # text_to_speech_with_poping 과 같은 규칙으로 5초 슬롯 트랙 구성
+    combined, offsets = audio_track.assemble_track(clips, tts.TRACK_SAMPLE_RATE)
+
+    # 모델 로드 시간은 비교에서 제외
+    tts.whisper_registry.get_model()
+
+    start = time.perf_counter()
+    sentence_timings = run_sentence_mode(clips)
+    sentence_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    track_timings = tts.align_track_words(combined, offsets)
+    track_seconds = time.perf_counter() - start
+
+    word_counts = (sum(map(len, sentence_timings)), sum(map(len, track_timings)))
+    print(f"문장 수: {len(sentences)} | 트랙 길이: {len(combined) / tts.TRACK_SAMPLE_RATE:.1f}s")
+    print(f"sentence 모드: {sentence_seconds:.2f}s | 단어 {word_counts[0]}개")
+    print(f"track 모드:    {track_seconds:.2f}s | 단어 {word_counts[1]}개")
+    print(f"속도 향상: x{sentence_seconds / track_seconds:.2f}")
+    print(f"단어 경계 평균 차이: {boundary_error(sentence_timings, track_timings):.3f}s")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:] or SAMPLE_SENTENCES)
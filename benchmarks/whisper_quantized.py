@@ -0,0 +1,65 @@
+# fp32 Whisper 와 int8 양자화 Whisper 의 단어 경계 정확도 / 지연 시간 비교 리포트
+# 실행: python -m benchmarks.whisper_quantized [모델 ...]  (GOOGLE_TTS_API_KEY 필요)
+# 기준값은 현재 analyze_audio_words_with_whisper 기본 경로("base" fp32) 결과
+import asyncio
+import statistics
+import sys
+import time
+from apis import googleTTS as tts
+from apis import whisper_registry
+from benchmarks.whisper_alignment import SAMPLE_SENTENCES, synthesize
+
+REFERENCE_MODEL = "base"
+DEFAULT_CANDIDATES = ["base-int8", "tiny", "tiny-int8", "small-int8"]
+
+
+def analyze_all(clips, model_name):
+    # 문장별 단어 타이밍과 문장당 평균 분석 시간(초) 반환
+    whisper_registry.get_model(model_name)  # 모델 로드 시간은 제외
+    timings = []
+    elapsed = []
+    for clip in clips:
+        start = time.perf_counter()
+        timings.append(tts.analyze_audio_words_with_whisper(tts.to_whisper_input(clip), model_name))
+        elapsed.append(time.perf_counter() - start)
+    return timings, statistics.mean(elapsed)
+
+
+def compare(reference, candidate):
+    # 단어 수가 같은 문장만 경계 비교, 나머지는 단어 분할 불일치로 집계
+    diffs = []
+    matched_sentences = 0
+    for ref_words, cand_words in zip(reference, candidate):
+        if len(ref_words) != len(cand_words):
+            continue
+        matched_sentences += 1
+        for ref, cand in zip(ref_words, cand_words):
+            diffs.append(abs(ref["start"] - cand["start"]))
+            diffs.append(abs(ref["end"] - cand["end"]))
+    return {
+        "sentence_match": matched_sentences / len(reference) if reference else 0.0,
+        "mean_diff": statistics.mean(diffs) if diffs else float("nan"),
+        "max_diff": max(diffs) if diffs else float("nan"),
+    }
+
+
+def main(candidates):
+    clips = asyncio.run(synthesize(SAMPLE_SENTENCES))
+    reference, reference_latency = analyze_all(clips, REFERENCE_MODEL)
+
+    print(f"| 모델 | 문장당 지연(s) | 속도 | 단어 수 일치 문장 | 평균 경계 차이(s) | 최대 경계 차이(s) | 모델 크기(MB) |")
+    print("|---|---|---|---|---|---|---|")
+    size_mb = whisper_registry.model_stats()["models"][REFERENCE_MODEL]["param_bytes"] / 1024 / 1024
+    print(f"| {REFERENCE_MODEL} (기준) | {reference_latency:.2f} | x1.00 | 100% | 0.000 | 0.000 | {size_mb:.0f} |")
+
+    for model_name in candidates:
+        timings, latency = analyze_all(clips, model_name)
+        result = compare(reference, timings)
+        size_mb = whisper_registry.model_stats()["models"][model_name]["param_bytes"] / 1024 / 1024
+        print(f"| {model_name} | {latency:.2f} | x{reference_latency / latency:.2f} | "
+              f"{result['sentence_match']:.0%} | {result['mean_diff']:.3f} | {result['max_diff']:.3f} | {size_mb:.0f} |")
+        whisper_registry.evict_model(model_name)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:] or DEFAULT_CANDIDATES)
@@ -1,10 +1,13 @@
 from fastapi import FastAPI
 from apis import ai_material, video_partial, video_final, thumbnail, image_partial, get_music
+from apis import whisper_registry, googleTTS, alignment_workers, video_readers, render_pool, segment_render, audio_mixer
+from apis import segment_normalize, media_probe
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from dotenv import load_dotenv
 import os
+import asyncio
 
 load_dotenv()
 SERVER_HOST = os.getenv("SERVER_HOST")
@@ -33,6 +36,53 @@ app.include_router(thumbnail.router)
 app.include_router(image_partial.router, prefix="/generate/material", tags=["AI_Image"])
 app.include_router(get_music.router, tags=["Music"]) 
 
+# 서버 시작 시 정렬 / 렌더 워커 풀 시작, 정렬 워커를 쓰지 않으면 Whisper 모델을 이 프로세스에 미리 로드
+@app.on_event("startup")
+async def preload_whisper_models():
+    render_pool.start_workers()
+    if audio_mixer.BGM_PRELOAD and (video_final.FINAL_RENDER_ENGINE == "pipeline" or render_pool.RENDER_WORKERS <= 0):
+        # 파이프라인 엔진 / 스레드 렌더링일 때만 이 프로세스에서 오디오를 믹스하므로 배경음악을 미리 디코딩
+        # (렌더 워커는 워커 시작 시 각자 미리 디코딩)
+        await asyncio.to_thread(audio_mixer.preload_bgm, "music", googleTTS.TRACK_SAMPLE_RATE)
+    if alignment_workers.ALIGNMENT_WORKERS > 0:
+        alignment_workers.start_workers()
+    else:
+        await asyncio.to_thread(whisper_registry.preload_models)
+
+# 서버 종료 시 TTS HTTP 커넥션 풀 / 정렬 워커 / 렌더 워커 정리
+@app.on_event("shutdown")
+async def close_tts_client():
+    await googleTTS.close_http_client()
+    alignment_workers.shutdown_workers()
+    render_pool.shutdown_workers()
+    segment_render.shutdown_workers()
+
+# 로드된 Whisper 모델의 로드 시간 / 메모리 사용량 조회
+@app.get("/whisper/models", tags=["Status"])
+async def whisper_model_stats():
+    # 정렬 워커를 쓰면 모델은 워커 프로세스에만 로드되므로 워커마다 조회
+    workers = await alignment_workers.worker_stats(whisper_registry.model_stats)
+    models = {}
+    for worker in workers:
+        for name, stats in worker["models"].items():
+            models.setdefault(name, stats)
+    return {
+        "models": models,
+        "rss_bytes": sum(worker["rss_bytes"] for worker in workers),
+        "workers": workers,
+    }
+
+# 렌더링 대기열 상태와 (API + 렌더 / 세그먼트 워커에서) 열려 있는 ffmpeg 영상 리더 수 / 메모리, 배경음악 / 영상 정보 캐시 조회
+@app.get("/render/stats", tags=["Status"])
+async def render_stats():
+    return {
+        "queue": render_pool.queue_stats(),
+        "readers": video_readers.all_reader_stats(),
+        "bgm_cache": audio_mixer.cache_stats(),
+        "media_probe": media_probe.cache_stats(),
+        "normalize": segment_normalize.normalize_stats(),
+    }
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to AI Video Generation API"}